@@ -0,0 +1,268 @@
+import json
+from datetime import datetime
+from itertools import islice
+from flask import Blueprint, Response, abort, jsonify, request, stream_with_context
+from sqlalchemy import select
+from models import Venue, Artist, Show, Genre, venue_genres, artist_genres, db
+from queries import venue_detail, genre_names_by_id
+from profiles import get_artist_profile
+from show_counts import request_now
+from pagination import InvalidCursor, keyset_page, page_size
+from conditional import conditional
+from search import escape_like
+
+#----------------------------------------------------------------------------#
+# JSON API (/api/v1)
+# - Collections are keyset paginated (?cursor=, ?limit=) and filterable
+# - ?format=ndjson (or Accept: application/x-ndjson) streams the whole
+#   filtered collection, one object per line, from a server-side cursor in
+#   batches of STREAM_BATCH rows, so memory stays flat however many rows
+# - Rows are selected as plain column tuples and written straight to JSON
+#   text; genres are fetched once per page/batch, show counts are columns
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+STREAM_BATCH = 500
+NDJSON = 'application/x-ndjson'
+
+VENUE_COLUMNS = (Venue.id, Venue.name, Venue.address, Venue.city, Venue.state, Venue.phone, Venue.website,
+                 Venue.image_link, Venue.facebook_link, Venue.seeking_talent, Venue.seeking_description,
+                 Venue.timezone, Venue.upcoming_shows_count, Venue.past_shows_count)
+ARTIST_COLUMNS = (Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone, Artist.website,
+                  Artist.image_link, Artist.facebook_link, Artist.seeking_venue, Artist.seeking_description,
+                  Artist.upcoming_shows_count, Artist.past_shows_count)
+SHOW_COLUMNS = (Show.id, Show.start_time, Show.venue_id, Venue.name.label('venue_name'), Show.artist_id,
+                Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'))
+GENRE_FIELDS = ('genres',)
+
+
+#  Serialization
+#  ----------------------------------------------------------------
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+_dumps = json.JSONEncoder(separators=(',', ':'), default=_default).encode
+
+
+def row_encoder(fields):
+    # The '"field":' fragments are encoded once; each row is then written
+    # as a JSON object without building a dict for it
+    prefixes = ['{' + _dumps(fields[0]) + ':'] + [',' + _dumps(field) + ':' for field in fields[1:]]
+    def encode(values):
+        return ''.join(prefix + _dumps(value) for prefix, value in zip(prefixes, values)) + '}'
+    return encode
+
+
+def _fields(columns, extra=()):
+    return tuple(column.key for column in columns) + tuple(extra)
+
+
+def _entity_rows(association, column):
+    # Appends genres to a batch of rows (the show counts are columns)
+    def extend(rows):
+        genres = genre_names_by_id(association, column, [row[0] for row in rows])
+        return [(*row, genres.get(row[0], [])) for row in rows]
+    return extend
+
+
+class Collection:
+    def __init__(self, columns, keys, extend=None, extra_fields=()):
+        self.columns = columns
+        self.keys = keys
+        self.width = len(columns)
+        self.extend = extend or list
+        self.encode = row_encoder(_fields(columns, extra_fields))
+
+    def encode_rows(self, rows):
+        return [self.encode(row) for row in self.extend(rows)]
+
+
+VENUES = Collection(VENUE_COLUMNS, [(Venue.name, False), (Venue.id, False)],
+                    _entity_rows(venue_genres, venue_genres.c.venue_id), GENRE_FIELDS)
+ARTISTS = Collection(ARTIST_COLUMNS, [(Artist.name, False), (Artist.id, False)],
+                     _entity_rows(artist_genres, artist_genres.c.artist_id), GENRE_FIELDS)
+SHOWS = Collection(SHOW_COLUMNS, [(Show.start_time, False), (Show.id, False)])
+
+
+def _wants_ndjson():
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def _collection_format():
+    # conditional() variant of the collections: JSON pages or NDJSON
+    return NDJSON if _wants_ndjson() else 'application/json'
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, size)), [])
+
+
+def _collection_response(collection, query):
+    if _wants_ndjson():
+        # Whole collection in key order from a server-side cursor
+        rows = query.order_by(*[expression for expression, _ in collection.keys]).yield_per(STREAM_BATCH)
+        def generate():
+            for batch in batches(rows, STREAM_BATCH):
+                yield ''.join(line + '\n' for line in collection.encode_rows(batch))
+        return Response(stream_with_context(generate()), mimetype=NDJSON)
+
+    try:
+        page = keyset_page(query, collection.keys, request.args.get('cursor'), page_size(request.args.get('limit')))
+    except InvalidCursor:
+        abort(400, 'Invalid cursor')
+    # Drop the trailing sort key columns
+    rows = [tuple(row)[:collection.width] for row in page.items]
+    body = '{"data":[' + ','.join(collection.encode_rows(rows)) + ']' + \
+        ',"next_cursor":' + _dumps(page.next_cursor) + ',"prev_cursor":' + _dumps(page.prev_cursor) + '}'
+    return Response(body, mimetype='application/json')
+
+
+#  Filters
+#  ----------------------------------------------------------------
+
+def _flag(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    abort(400, f'{name} must be true or false')
+
+
+def _int(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, f'{name} must be an integer')
+
+
+def _datetime(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        abort(400, f'{name} must be an ISO 8601 date/time')
+
+
+def _filter_entities(query, model, association, column):
+    # city, state (exact), name (substring) and genre filters shared by
+    # venues and artists
+    for name in ('city', 'state'):
+        value = request.args.get(name)
+        if value:
+            query = query.filter(getattr(model, name) == value)
+    name = request.args.get('name')
+    if name:
+        query = query.filter(model.name.ilike(f'%{escape_like(name)}%', escape='\\'))
+    genre = request.args.get('genre')
+    if genre:
+        tagged = select(column).join(Genre, Genre.id == association.c.genre_id).where(Genre.name == genre)
+        query = query.filter(model.id.in_(tagged))
+    return query
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@api.route('/venues')
+@conditional('venue', 'show', variant=_collection_format)
+def venues():
+    query = _filter_entities(db.session.query(*VENUES.columns), Venue, venue_genres, venue_genres.c.venue_id)
+    seeking_talent = _flag('seeking_talent')
+    if seeking_talent is not None:
+        query = query.filter(Venue.seeking_talent == seeking_talent)
+    return _collection_response(VENUES, query)
+
+
+@api.route('/venues/<int:venue_id>')
+@conditional('venue', 'artist', 'show')
+def venue(venue_id):
+    data = venue_detail(venue_id)
+    if data is None:
+        abort(404)
+    # Show times are datetimes, written like the other endpoints
+    return Response(_dumps(data), mimetype='application/json')
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@api.route('/artists')
+@conditional('artist', 'show', variant=_collection_format)
+def artists():
+    query = _filter_entities(db.session.query(*ARTISTS.columns), Artist, artist_genres, artist_genres.c.artist_id)
+    seeking_venue = _flag('seeking_venue')
+    if seeking_venue is not None:
+        query = query.filter(Artist.seeking_venue == seeking_venue)
+    return _collection_response(ARTISTS, query)
+
+
+@api.route('/artists/<int:artist_id>')
+@conditional('artist', 'venue', 'show')
+def artist(artist_id):
+    data = get_artist_profile(artist_id)
+    if data is None:
+        abort(404)
+    return jsonify(data)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+def _shows_query():
+    return db.session.query(*SHOWS.columns) \
+        .join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id)
+
+
+@api.route('/shows')
+@conditional('show', 'venue', 'artist', variant=_collection_format)
+def shows():
+    query = _shows_query()
+    for name, column in (('venue_id', Show.venue_id), ('artist_id', Show.artist_id)):
+        value = _int(name)
+        if value is not None:
+            query = query.filter(column == value)
+    start, end = _datetime('from'), _datetime('to')
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    upcoming = _flag('upcoming')
+    if upcoming is not None:
+        now = request_now()
+        query = query.filter(Show.start_time > now if upcoming else Show.start_time <= now)
+    return _collection_response(SHOWS, query)
+
+
+@api.route('/shows/<int:show_id>')
+@conditional('show', 'venue', 'artist')
+def show(show_id):
+    row = _shows_query().filter(Show.id == show_id).first()
+    if row is None:
+        abort(404)
+    return Response(SHOWS.encode(row), mimetype='application/json')
+
+
+#  Errors
+#  ----------------------------------------------------------------
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return jsonify({'error': error.code, 'message': error.description}), error.code
@@ -0,0 +1,227 @@
+import logging
+from datetime import datetime
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from forms import ArtistForm
+from models import Artist, Genre, db
+from queries import artists_page, artists_by_genre, genre_names
+from pagination import InvalidCursor, keyset_page, page_size
+from cache import cached_page, bump_versions
+from conditional import conditional
+from search import artist_search, index_artist
+from profiles import get_artist_profile, refresh_artist_profile
+
+#----------------------------------------------------------------------------#
+# Artist pages: listing, search, genre pages, detail, create, edit
+#----------------------------------------------------------------------------#
+
+bp = Blueprint('artists', __name__)
+log = logging.getLogger(__name__)
+
+
+#  Artists
+#  ----------------------------------------------------------------
+@bp.route('/artists')
+@conditional('artist')
+@cached_page('artist')
+def artists():
+    try:
+        page = artists_page(request.args.get('cursor'), page_size(request.args.get('limit')))
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occurred. Cannot display artists')
+        return redirect(url_for('index'))
+    return render_template('pages/artists.html', artists=page.items, page=page)
+
+@bp.route('/artists/search', methods=['GET', 'POST'])
+def search_artists():
+    # POST from the search box, GET from the pager links
+    search_item = request.values.get('search_term', '')
+    data = []
+    try:
+        # Matches name, city, state and genres, best match first
+        query, keys = artist_search(search_item)
+        page = keyset_page(query, keys, request.args.get('cursor'), page_size(request.args.get('limit')))
+        search_result_list = page.items
+
+        # Make result
+        for artist in search_result_list:
+            data.append({
+                "id": artist.id,
+                "name": artist.name,
+                "num_upcoming_shows": artist.upcoming_shows_count
+            })
+        
+        # Generate the response
+        response = {
+            "count": query.order_by(None).count(),
+            "data": data
+        }
+
+        return render_template('pages/search_artists.html', results=response, page=page, search_term=search_item)
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occured while searching')
+        return redirect(url_for('venues.venues'))
+
+@bp.route('/artists/genres/<genre>')
+@conditional('artist')
+@cached_page('artist')
+def artists_genre(genre):
+    try:
+        page = artists_by_genre(genre, request.args.get('cursor'), page_size(request.args.get('limit')))
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occurred. Cannot display artists')
+        return redirect(url_for('artists.artists'))
+    return render_template('pages/genre.html', kind='artists', genre=genre, items=page.items, page=page)
+
+@bp.route('/artists/<int:artist_id>')
+@conditional('artist', 'venue', 'show')
+@cached_page('artist', 'venue', 'show')
+def show_artist(artist_id):
+    try:
+        # Served from the precomputed profile document
+        data = get_artist_profile(artist_id)
+    except:
+        flash('An error occurred. Cannot show the artist')
+        return redirect(url_for('index'))
+    if data is None:
+        abort(404)
+    return render_template('pages/show_artist.html', artist=data)
+
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    try: 
+        form = ArtistForm()
+        # Get the artist entity
+        artist_ent = Artist.query.filter_by(id = artist_id).first()
+        # Check for valid entity
+        if (artist_ent is not None):
+            artist = {}
+            artist["id"] = artist_ent.id
+            artist["name"] = artist_ent.name
+            artist["genres"] = genre_names(artist_ent.genres)
+            artist["city"] = artist_ent.city
+            artist["state"] = artist_ent.state
+            artist["phone"] = artist_ent.phone
+            artist["website"] = artist_ent.website
+            artist["facebook_link"] = artist_ent.facebook_link
+            artist["seeking_venue"] = artist_ent.seeking_venue
+            artist["image_link"] = artist_ent.image_link
+            if (artist_ent.seeking_venue == True): 
+                artist["seeking_description"] = artist_ent.seeking_description
+            return render_template('forms/edit_artist.html', form=form, artist=artist)
+        else:
+            flash(f'The artist id {artist_id} is invalid')
+            return redirect(url_for('index'))
+    except:
+        flash('An error occurred. Cannot get the artist')
+        return redirect(url_for('index'))  
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    try:
+        artist_to_update = Artist.query.filter_by(id = artist_id).first()
+        if (artist_to_update is not None):
+            old_name = artist_to_update.name
+            form = ArtistForm()
+            if form.validate():
+                artist_to_update.name=form.name.data
+                artist_to_update.city=form.city.data
+                artist_to_update.state=form.state.data
+                artist_to_update.phone=form.phone.data
+                artist_to_update.genres=Genre.from_names(form.genres.data)
+                # A genre change alone doesn't touch the row; exports rely on updated_at
+                artist_to_update.updated_at=datetime.now()
+                artist_to_update.facebook_link=form.facebook_link.data
+                artist_to_update.image_link=form.image_link.data
+                artist_to_update.website=form.website_link.data
+                artist_to_update.seeking_venue=form.seeking_venue.data
+                # If we don't tick into seeking_talent, the web won't record the seeking_description 
+                artist_to_update.seeking_description= form.seeking_description.data if (form.seeking_venue.data) else None
+                refresh_artist_profile(artist_id)
+                index_artist(artist_to_update)
+                bump_versions('artist')
+                # Commit the change
+                db.session.commit() 
+                flash(f'Update artist {old_name} Success!')
+            else: 
+                errorMessage = "Errors in the following fields: "
+                for error in form.errors:
+                    errorMessage += error + " "
+                flash(errorMessage)
+        else:
+        # Return the homepage
+            flash('The artist id is invalid')
+            return redirect(url_for('index'))
+    except:
+        # catches errors
+        db.session.rollback()
+        flash(f'An error occurred. Artist {old_name} could not be updated.')
+    finally:
+        # closes session
+        db.session.close()
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    try:
+        # Get form data 
+        form = ArtistForm()
+        if form.validate():
+            new_name = form.name.data
+            new_name_count = Artist.query.filter_by(name = new_name).count()
+            log.debug('%d artist(s) named %r', new_name_count, new_name)
+            if (new_name_count == 0):
+                artist = Artist(
+                    name = new_name,
+                    city = form.city.data,
+                    state = form.state.data,
+                    phone = form.phone.data,
+                    genres = Genre.from_names(form.genres.data),
+                    facebook_link = form.facebook_link.data,
+                    image_link = form.image_link.data,
+                    website = form.website_link.data,
+                    seeking_venue = form.seeking_venue.data,
+                    seeking_description = form.seeking_description.data if (form.seeking_venue.data) else None
+                )
+                # commit session to database
+                db.session.add(artist)
+                # Flush to get the id, the profile is written in the same transaction
+                db.session.flush()
+                refresh_artist_profile(artist.id)
+                index_artist(artist)
+                bump_versions('artist')
+                db.session.commit()
+                # on successful db insert, flash success
+                flash('Artist ' + request.form['name'] + ' was successfully listed!')
+            else:
+                flash ('Artist ' + request.form['name'] + ' was existed')
+        else:
+            errorMessage = "Errors in the following fields: "
+            for error in form.errors:
+                errorMessage += error + " "
+            flash(errorMessage)
+    except:
+        # Catches errors
+        db.session.rollback()
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+    finally:
+        # closes session
+        db.session.close()
+    return render_template('pages/home.html')
@@ -0,0 +1,218 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from flask import abort, current_app, request, send_from_directory
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Static assets (`flask assets build`)
+# - The CSS and JS of the layouts are concatenated into bundles, minified,
+#   and written to static/dist/ under a content hash, next to .gz (and .br
+#   with the optional brotli package) variants
+# - dist/manifest.json maps bundle names to the hashed files;
+#   url_for('static', filename='dist/app.css') returns the hashed URL
+# - Hashed files are served precompressed with a one year immutable
+#   Cache-Control; everything else under static/ as before
+#----------------------------------------------------------------------------#
+
+DIST = 'dist'
+MANIFEST = 'dist/manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+HASHED = re.compile(r'^dist/[\w-]+\.[0-9a-f]{12}\.(css|js)$')
+
+# bundle name: sources, relative to the static folder and in load order.
+# dist/ is at the same depth as css/, so relative url()s keep working.
+BUNDLES = {
+    'dist/app.css': ['css/bootstrap.min.css', 'css/layout.main.css', 'css/main.css',
+                     'css/main.responsive.css', 'css/main.quickfix.css'],
+    'dist/head.js': ['js/libs/modernizr-2.8.2.min.js', 'js/libs/moment.min.js'],
+    'dist/app.js': ['js/script.js', 'js/libs/bootstrap-3.1.1.min.js', 'js/plugins.js'],
+    'dist/respond.js': ['js/libs/respond-1.4.2.min.js'],
+}
+
+
+#  Minification
+#  ----------------------------------------------------------------
+
+_CSS_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+# Not around ':' ("a :hover" and "a:hover" differ)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(text):
+    # Conservative: comments (except /*! licences */), runs of whitespace and
+    # the spaces around braces, semicolons, commas and child selectors
+    text = _CSS_COMMENT.sub('', text)
+    text = _CSS_SPACE.sub(' ', text)
+    text = _CSS_PUNCTUATION.sub(r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Needs the optional rjsmin package; scripts are left as they are without it
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text)
+
+
+def _minify(source, text):
+    if '.min.' in source:
+        return text
+    if source.endswith('.css'):
+        return minify_css(text)
+    return minify_js(text)
+
+
+#  Build
+#  ----------------------------------------------------------------
+
+def _write(path, data):
+    # Write then rename so a running server never serves a partial file
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+def _brotli(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def _bundle(static_folder, sources):
+    parts = []
+    for source in sources:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as file:
+            parts.append(_minify(source, file.read()))
+    # ';' keeps scripts apart when one doesn't end with a semicolon
+    separator = '\n' if sources[0].endswith('.css') else ';\n'
+    return separator.join(parts).encode('utf-8')
+
+
+def build_assets(static_folder):
+    # Returns the manifest {bundle name: hashed name}
+    os.makedirs(os.path.join(static_folder, DIST), exist_ok=True)
+    previous = load_manifest(static_folder) or {}
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        data = _bundle(static_folder, sources)
+        stem, extension = os.path.splitext(name)
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}'
+        path = os.path.join(static_folder, hashed)
+        if not os.path.exists(path):
+            _write(path + '.gz', gzip.compress(data, 9, mtime=0))
+            compressed = _brotli(data)
+            if compressed is not None:
+                _write(path + '.br', compressed)
+            _write(path, data)
+        manifest[name] = hashed
+    _write(os.path.join(static_folder, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    _prune(static_folder, set(manifest.values()) | set(previous.values()))
+    return manifest
+
+
+def _prune(static_folder, keep):
+    # Removes older builds; the previous one stays for pages still open
+    for filename in os.listdir(os.path.join(static_folder, DIST)):
+        name = f'{DIST}/{filename}'
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if HASHED.match(base) and base not in keep:
+            os.remove(os.path.join(static_folder, name))
+
+
+def _sources_changed(static_folder):
+    try:
+        built = os.path.getmtime(os.path.join(static_folder, MANIFEST))
+    except OSError:
+        return True
+    return any(os.path.getmtime(os.path.join(static_folder, source)) > built
+               for sources in BUNDLES.values() for source in sources)
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, MANIFEST)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+#  Serving
+#  ----------------------------------------------------------------
+
+def _fingerprint(endpoint, values):
+    # url_defaults hook: static bundle names -> hashed file names
+    if endpoint == 'static' and 'filename' in values:
+        manifest = current_app.extensions['assets']
+        values['filename'] = manifest.get(values['filename'], values['filename'])
+
+
+def _rebuild_if_changed():
+    # Debug only: pick up edits to the sources without a manual build
+    app = current_app._get_current_object()
+    if _sources_changed(app.static_folder):
+        try:
+            app.extensions['assets'].update(build_assets(app.static_folder))
+        except OSError:
+            log.exception('Cannot build the static asset bundles')
+
+
+def _send_unbuilt(app, filename):
+    # No build (see init_assets): the bundle is assembled per request
+    try:
+        data = _bundle(app.static_folder, BUNDLES[filename])
+    except OSError:
+        abort(404)
+    response = app.response_class(data, mimetype=mimetypes.guess_type(filename)[0])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def send_static(filename):
+    app = current_app._get_current_object()
+    if filename in BUNDLES and not os.path.exists(os.path.join(app.static_folder, filename)):
+        return _send_unbuilt(app, filename)
+    if not HASHED.match(filename):
+        return app.send_static_file(filename)
+    encodings = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encodings[encoding] and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename)
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_assets(app):
+    manifest = load_manifest(app.static_folder)
+    if manifest is None or set(manifest) != set(BUNDLES) or _sources_changed(app.static_folder):
+        # e.g. a fresh checkout or a deploy without `flask assets build`
+        log.warning('Static asset bundles missing or out of date, building them')
+        try:
+            manifest = build_assets(app.static_folder)
+        except OSError:
+            # e.g. a read-only static folder: run `flask assets build` when
+            # deploying. Meanwhile the previous build, or unhashed bundles.
+            log.exception('Cannot build the static asset bundles')
+            manifest = manifest or {}
+    app.extensions['assets'] = manifest
+    app.url_defaults(_fingerprint)
+    app.view_functions['static'] = send_static
+    if app.debug:
+        app.before_request(_rebuild_if_changed)
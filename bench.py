@@ -0,0 +1,159 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from flask import url_for
+from models import Venue, Artist, Show, Genre, db
+from cache import NullCache
+from instrumentation import count_queries
+
+#----------------------------------------------------------------------------#
+# Route benchmarks (`flask bench`)
+# - Drives every GET route (and the search POSTs) through the test client
+#   against the configured database, usually filled by `flask seed`
+# - Per route: latency percentiles over N timed requests, the number of SQL
+#   statements and the peak Python memory of one extra, traced request
+# - Results are written as JSON; compare() diffs a run against a baseline
+#----------------------------------------------------------------------------#
+
+# Endpoints that need credentials or are not part of the site
+SKIPPED_ENDPOINTS = ('static', 'admin.export_catalog')
+SEARCH_ENDPOINTS = ('search_venues', 'search_artists')
+SEARCH_TERM = 'blue'
+
+
+def _samples():
+    # Values for the route arguments, taken from the data
+    venue_id = db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar()
+    artist_id = db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar()
+    show_id = db.session.query(Show.id).order_by(Show.id).limit(1).scalar()
+    genre = db.session.query(Genre.name).order_by(Genre.name).limit(1).scalar()
+    return {'venue_id': venue_id, 'artist_id': artist_id, 'show_id': show_id, 'genre': genre}
+
+
+def discover_routes(app):
+    # [(name, method, path, form data)] for every benchmarkable route
+    samples = _samples()
+    routes = []
+    with app.test_request_context():
+        for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+            if rule.endpoint in SKIPPED_ENDPOINTS or rule.endpoint.startswith('debug'):
+                continue
+            values = {name: samples.get(name) for name in rule.arguments}
+            if any(value is None for value in values.values()):
+                continue
+            path = url_for(rule.endpoint, **values)
+            if 'GET' in rule.methods:
+                routes.append((f'GET {rule.rule}', 'GET', path, None))
+            if 'POST' in rule.methods and rule.endpoint.endswith(SEARCH_ENDPOINTS):
+                routes.append((f'POST {rule.rule}', 'POST', path, {'search_term': SEARCH_TERM}))
+    return routes
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = (len(values) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (index - lower)
+
+
+def _request(client, method, path, data):
+    if method == 'POST':
+        return client.post(path, data=data)
+    return client.get(path)
+
+
+def bench_route(app, client, method, path, data, iterations, warmup):
+    for _ in range(warmup):
+        _request(client, method, path, data)
+    timings = []
+    status = None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = _request(client, method, path, data)
+        timings.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+    # Queries and memory from one more request, kept out of the timings
+    with app.app_context(), count_queries() as counter:
+        tracemalloc.start()
+        try:
+            _request(client, method, path, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        'path': path,
+        'status': status,
+        'iterations': iterations,
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p90_ms': round(_percentile(timings, 90), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': counter.count,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(app, iterations=20, warmup=2, only=None, use_cache=False):
+    # Returns the result document; only is an optional substring filter on
+    # the route names
+    saved_cache = app.extensions['response_cache']
+    if not use_cache:
+        # Measure the work of the views, not cache hits
+        app.extensions['response_cache'] = NullCache()
+    try:
+        with app.app_context():
+            routes = discover_routes(app)
+            counts = {model.__tablename__: db.session.query(model).count() for model in (Venue, Artist, Show)}
+            dialect = db.engine.dialect.name
+        client = app.test_client()
+        results = {}
+        for name, method, path, data in routes:
+            if only and not any(part in name for part in only):
+                continue
+            results[name] = bench_route(app, client, method, path, data, iterations, warmup)
+    finally:
+        app.extensions['response_cache'] = saved_cache
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'database': dialect,
+            'rows': counts,
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'cache': use_cache,
+        },
+        'routes': results,
+    }
+
+
+def write_results(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(results, baseline, tolerance=0.2):
+    # [(route, metric, baseline, current, regressed)] for the routes in both
+    # runs; latency regresses beyond the tolerance, query counts on any rise
+    rows = []
+    for name, current in sorted(results['routes'].items()):
+        previous = baseline['routes'].get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p90_ms', 'queries', 'peak_memory_kb'):
+            before, after = previous[metric], current[metric]
+            if metric == 'queries':
+                regressed = after > before
+            else:
+                regressed = after > before * (1 + tolerance)
+            rows.append((name, metric, before, after, regressed))
+    return rows
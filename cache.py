@@ -0,0 +1,268 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from models import EntityVersion, db
+
+#----------------------------------------------------------------------------#
+# Response cache
+# - Pages are cached under a key that includes the version counters of the
+#   entities they are built from ('venue', 'artist', 'show')
+# - Write handlers call bump_versions() inside their transaction, so a page
+#   built from old data is never served again once the write commits
+# - Counters live in the database (EntityVersion) so every worker sees the
+#   same versions whatever the backend
+# - Backends: in-process LRU (default), local disk, or Redis (shared)
+#----------------------------------------------------------------------------#
+
+ENTITIES = ('venue', 'artist', 'show')
+
+
+class BaseCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {
+            'backend': type(self).__name__,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+class NullCache(BaseCache):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(BaseCache):
+    # Per process; entries built from old versions simply age out
+    def __init__(self, max_entries=1000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['entries'] = len(self._entries)
+        return stats
+
+
+class FileSystemCache(BaseCache):
+    # Shared by the workers of one host
+    def __init__(self, directory, max_entries=10000):
+        super().__init__()
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as file:
+                expires, value = pickle.load(file)
+        except (OSError, EOFError, pickle.PickleError):
+            return None
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        self._prune()
+        # Write then rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump((expires, value), file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+    def _prune(self):
+        entries = os.listdir(self.directory)
+        if len(entries) < self.max_entries:
+            return
+        # Drop the oldest half
+        paths = sorted((os.path.join(self.directory, name) for name in entries), key=os.path.getmtime)
+        for path in paths[:len(paths) // 2]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class RedisCache(BaseCache):
+    # Shared by every host; needs the optional redis package
+    def __init__(self, url, prefix='fyyur:'):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_TYPE = "redis" needs the redis package (pip install redis)')
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, timeout=None):
+        self._client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=timeout or None)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+
+def create_cache(config):
+    cache_type = config.get('CACHE_TYPE', 'lru')
+    if cache_type == 'null':
+        return NullCache()
+    if cache_type == 'lru':
+        return LRUCache(config.get('CACHE_MAX_ENTRIES', 1000))
+    if cache_type == 'filesystem':
+        return FileSystemCache(config['CACHE_DIR'], config.get('CACHE_MAX_ENTRIES', 10000))
+    if cache_type == 'redis':
+        return RedisCache(config['CACHE_REDIS_URL'])
+    raise ValueError(f'Unknown CACHE_TYPE {cache_type!r}')
+
+
+def init_cache(app):
+    app.extensions['response_cache'] = create_cache(app.config)
+
+
+def get_cache():
+    return current_app.extensions['response_cache']
+
+
+#  Entity versions
+#  ----------------------------------------------------------------
+
+def _load_versions():
+    # One query for the versions and last write times of every entity type,
+    # by primary key so it doesn't show up as a sequential scan in `flask explain`
+    versions = dict.fromkeys(ENTITIES, 0)
+    modified = dict.fromkeys(ENTITIES)
+    rows = db.session.query(EntityVersion.name, EntityVersion.version, EntityVersion.updated_at) \
+        .filter(EntityVersion.name.in_(ENTITIES))
+    for name, version, updated_at in rows:
+        versions[name] = version
+        modified[name] = updated_at
+    g.entity_versions = versions
+    g.entity_modified = modified
+
+
+def entity_versions():
+    # {entity: version}, read once per request
+    if 'entity_versions' not in g:
+        _load_versions()
+    return g.entity_versions
+
+
+def entity_modified():
+    # {entity: time of the last write or None}, read once per request
+    if 'entity_modified' not in g:
+        _load_versions()
+    return g.entity_modified
+
+
+def bump_versions(*entities):
+    # Stage a version increment for each entity; the caller commits
+    for entity in entities:
+        updated = EntityVersion.query.filter_by(name=entity) \
+            .update({EntityVersion.version: EntityVersion.version + 1}, synchronize_session=False)
+        if not updated:
+            db.session.add(EntityVersion(name=entity, version=1))
+    g.pop('entity_versions', None)
+    g.pop('entity_modified', None)
+
+
+#  Page decorator
+#  ----------------------------------------------------------------
+
+def cacheable_request():
+    # Pages carrying flashed messages are specific to one visitor
+    return request.method == 'GET' and not session.get('_flashes')
+
+
+def cached_page(*entities):
+    # Cache a GET view's response under its URL and the versions of the
+    # entities it depends on. X-Cache tells whether it was a hit.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not cacheable_request():
+                return view(*args, **kwargs)
+            cache = get_cache()
+            versions = entity_versions()
+            key = 'page:' + request.full_path + ':' + ','.join(f'{entity}={versions[entity]}' for entity in entities)
+            cached = cache.get(key)
+            if cached is not None:
+                cache.hits += 1
+                body, status, mimetype = cached
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            cache.misses += 1
+            response = make_response(view(*args, **kwargs))
+            # Only plain 200 pages, and not when the view flashed something
+            if response.status_code == 200 and not response.direct_passthrough and cacheable_request():
+                cache.set(key, (response.get_data(), response.status_code, response.mimetype),
+                          current_app.config.get('CACHE_DEFAULT_TIMEOUT'))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
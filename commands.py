@@ -0,0 +1,337 @@
+import signal
+import sys
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from models import Venue, db
+from instrumentation import count_queries
+from cache import get_cache, bump_versions
+from search import reindex_all
+from jobs import WorkerPool, requeue_failed, run_due_jobs
+from profiles import rollover_artist_profiles, rebuild_artist_profiles
+from show_counts import reconcile_show_counts, rollover_show_counts
+from partitions import archive_shows, ensure_show_partitions, list_partitions, month_start
+
+#----------------------------------------------------------------------------#
+# Commands (registered on the app by create_app)
+# - The modules only the commands use (bench, seed, importer, export,
+#   explain, assets) are imported in the command functions, not by every
+#   web worker
+#----------------------------------------------------------------------------#
+
+def _check_choice(value, choices, param_hint):
+    # click.Choice for options whose choices live in modules the commands
+    # import lazily
+    if value not in choices:
+        raise click.BadParameter(f"{value!r} is not one of {', '.join(map(repr, choices))}.", param_hint=param_hint)
+
+
+@click.command('count-queries')
+@click.argument('paths', nargs=-1)
+@with_appcontext
+def count_queries_command(paths):
+    """Print how many SQL statements each GET path issues."""
+    client = current_app.test_client()
+    for path in paths or ('/venues',):
+        with count_queries() as counter:
+            response = client.get(path)
+        click.echo(f'{path} {response.status_code} queries={counter.count}')
+
+@click.command('explain')
+@click.argument('paths', nargs=-1)
+@click.option('--verbose', is_flag=True, help='Print every statement, not only the ones with sequential scans.')
+@with_appcontext
+def explain_command(paths, verbose):
+    """EXPLAIN the queries of each route and report sequential scans.
+
+    Exits with status 1 when any statement reads a table sequentially.
+    """
+    from explain import explain_routes
+    failed = False
+    for path, statements in explain_routes(current_app._get_current_object(), paths).items():
+        scans = sum(1 for _, tables in statements if tables)
+        click.echo(f'{path} statements={len(statements)} seq_scans={scans}')
+        for statement, tables in statements:
+            if tables or verbose:
+                click.echo(f"  {'SEQ SCAN ' + ', '.join(tables) if tables else 'ok'}: {' '.join(statement.split())}")
+        failed = failed or scans > 0
+    if failed:
+        sys.exit(1)
+
+
+@click.group('cache', cls=AppGroup)
+def cache_command():
+    """Manage the response cache."""
+
+
+@cache_command.command('clear')
+def cache_clear_command():
+    """Drop every cached page (versioned keys make this unnecessary after writes)."""
+    get_cache().clear()
+    click.echo('Cache cleared')
+
+
+@click.group('profiles', cls=AppGroup)
+def profiles_command():
+    """Maintain the artist profile read model."""
+
+
+@profiles_command.command('rollover')
+def profiles_rollover_command():
+    """Move started shows from upcoming to past (the job worker does this periodically)."""
+    count = rollover_artist_profiles()
+    if count:
+        bump_versions('artist')
+    db.session.commit()
+    click.echo(f'Refreshed {count} artist profile(s)')
+
+
+@profiles_command.command('rebuild')
+def profiles_rebuild_command():
+    """Rebuild the profile of every artist."""
+    count = rebuild_artist_profiles()
+    click.echo(f'Rebuilt {count} artist profile(s)')
+
+@click.group('counts', cls=AppGroup)
+def counts_command():
+    """Maintain the venue and artist show counters."""
+
+
+@counts_command.command('rollover')
+def counts_rollover_command():
+    """Move started shows from upcoming to past (the job worker does this periodically)."""
+    count = rollover_show_counts()
+    if count:
+        bump_versions('venue', 'artist')
+    db.session.commit()
+    click.echo(f'Moved {count} show(s) to past')
+
+
+@counts_command.command('reconcile')
+@click.option('--fix', is_flag=True, help='Correct the counters that are off.')
+def counts_reconcile_command(fix):
+    """Check the counters against the Show table.
+
+    Exits with status 1 when a counter is off and --fix wasn't given.
+    """
+    mismatches = reconcile_show_counts(fix)
+    for entity, id, stored, actual in mismatches:
+        click.echo(f'{entity} {id}: stored upcoming={stored.upcoming} past={stored.past}, '
+                   f'actual upcoming={actual.upcoming} past={actual.past}')
+    # The rollover it starts with may have moved shows too
+    bump_versions('venue', 'artist')
+    db.session.commit()
+    click.echo(f'{len(mismatches)} counter(s) off' + (', fixed' if fix and mismatches else ''))
+    if mismatches and not fix:
+        sys.exit(1)
+
+@click.group('shows', cls=AppGroup)
+def shows_command():
+    """Manage the Show partitions and the show archive."""
+
+
+@shows_command.command('partitions')
+@click.option('--months-ahead', type=int, help='Default: SHOW_PARTITION_MONTHS_AHEAD.')
+def shows_partitions_command(months_ahead):
+    """Create the monthly partitions of the coming months and list them (PostgreSQL)."""
+    if months_ahead is None:
+        months_ahead = current_app.config['SHOW_PARTITION_MONTHS_AHEAD']
+    created = ensure_show_partitions(months_ahead=months_ahead)
+    db.session.commit()
+    partitions = list_partitions()
+    if not partitions:
+        click.echo('Show is not partitioned on this database (PostgreSQL only)')
+        return
+    for name, _ in partitions:
+        click.echo(name + (' (created)' if name in created else ''))
+
+
+@shows_command.command('archive')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m']),
+              help='Archive the months before this one (default: SHOW_ARCHIVE_AFTER_MONTHS ago).')
+def shows_archive_command(before):
+    """Move past shows out of the live Show table into ShowArchive, whole months at a time."""
+    if before is None:
+        before = month_start(datetime.now())
+        for _ in range(current_app.config['SHOW_ARCHIVE_AFTER_MONTHS']):
+            before = (before - timedelta(days=1)).replace(day=1)
+    started = time.perf_counter()
+    moved = archive_shows(before)
+    bump_versions('venue', 'artist', 'show')
+    db.session.commit()
+    click.echo(f'Archived {moved} show(s) in {time.perf_counter() - started:.1f}s')
+
+@click.group('search', cls=AppGroup)
+def search_command():
+    """Maintain the venue and artist search index."""
+
+
+@search_command.command('reindex')
+def search_reindex_command():
+    """Rebuild the SQLite full-text tables (PostgreSQL indexes maintain themselves)."""
+    count = reindex_all()
+    click.echo(f'Indexed {count} row(s)')
+
+@click.group('assets', cls=AppGroup)
+def assets_command():
+    """Build the static CSS/JS bundles."""
+
+
+@assets_command.command('build')
+def assets_build_command():
+    """Bundle, minify, fingerprint and precompress the layout CSS and JS."""
+    from assets import build_assets
+    manifest = build_assets(current_app.static_folder)
+    current_app.extensions['assets'].update(manifest)
+    for name, hashed in sorted(manifest.items()):
+        click.echo(f'{name} -> {hashed}')
+
+@click.command('worker')
+@click.option('--threads', type=int, help='Jobs run at the same time (default: JOBS_WORKER_THREADS).')
+@click.option('--burst', is_flag=True, help='Run the jobs that are due, then exit.')
+@click.option('--requeue-failed', 'requeue', is_flag=True, help='Give the failed jobs a new set of attempts first.')
+@with_appcontext
+def worker_command(threads, burst, requeue):
+    """Run the background jobs (see jobs.py) until interrupted."""
+    if requeue:
+        click.echo(f'Requeued {requeue_failed()} failed job(s)')
+    if burst:
+        click.echo(f'Ran {run_due_jobs()} job(s)')
+        return
+    app = current_app._get_current_object()
+    pool = WorkerPool(app, threads or app.config['JOBS_WORKER_THREADS'], app.config['JOBS_POLL_INTERVAL'])
+    # SIGTERM (e.g. from a process manager) stops like Ctrl+C: running jobs finish
+    signal.signal(signal.SIGTERM, lambda *_: pool.stop(timeout=0))
+    pool.start()
+    click.echo(f'Worker running with {pool.threads} thread(s)')
+    try:
+        pool.wait()
+    except KeyboardInterrupt:
+        pass
+    click.echo('Stopping, waiting for the running jobs')
+    pool.stop()
+
+@click.command('import')
+@click.argument('kind')
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']), help='Defaults from the file extension.')
+@click.option('--batch-size', type=int, help='Rows per insert and commit (default: importer.DEFAULT_BATCH_SIZE).')
+@with_appcontext
+def import_command(kind, file, format, batch_size):
+    """Bulk load venues, artists or shows (KIND) from a CSV or NDJSON file.
+
+    Records are validated with the rules of the create forms. Duplicate
+    names are skipped, shows must reference existing artists and venues.
+    """
+    from export import KINDS
+    from importer import DEFAULT_BATCH_SIZE, detect_format, import_records, read_records
+    _check_choice(kind, KINDS, 'KIND')
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    records = read_records(file, format or detect_format(file.name))
+    progress = lambda report: click.echo(f'  {report.rows} rows, {report.rate:.0f} rows/s', err=True)
+    report = import_records(kind, records, batch_size, progress)
+    for error in report.errors:
+        click.echo(f'  {error}', err=True)
+    if report.invalid > len(report.errors):
+        click.echo(f'  ... {report.invalid - len(report.errors)} more invalid row(s)', err=True)
+    click.echo(report.summary())
+
+@click.command('export')
+@click.argument('kind')
+@click.option('--output', '-o', default='-', help='File to write, stdout by default.')
+@click.option('--format', 'format', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--since', help='Only rows changed after this ISO 8601 time.')
+@with_appcontext
+def export_command(kind, output, format, compress, since):
+    """Stream every venue, artist or show (KIND) to NDJSON or CSV.
+
+    The output can be loaded back with `flask import`.
+    """
+    from export import CatalogExport, KINDS, parse_since
+    _check_choice(kind, KINDS, 'KIND')
+    try:
+        since = parse_since(since)
+    except ValueError:
+        raise click.BadParameter('expected an ISO 8601 date/time', param_hint='--since')
+    export = CatalogExport(kind, format, since, compress)
+    started = time.perf_counter()
+    with click.open_file(output, 'wb') as file:
+        for chunk in export:
+            file.write(chunk)
+    elapsed = time.perf_counter() - started
+    click.echo(f'{kind}: {export.rows} rows in {elapsed:.1f}s', err=True)
+
+@click.command('seed')
+@click.option('--scale', default='10k', show_default=True, help='Number of shows, a key of seed.SCALES.')
+@click.option('--shows', type=int, help='Exact number of shows, overrides --scale.')
+@click.option('--seed', 'seed_value', default=0, show_default=True, help='Random seed.')
+@click.option('--anchor', type=click.DateTime(), help='Show times are spread around this day (default: today).')
+@click.option('--reset', is_flag=True, help='Delete every venue, artist and show first.')
+@click.option('--no-profiles', is_flag=True, help="Don't build the artist profiles.")
+@with_appcontext
+def seed_command(scale, shows, seed_value, anchor, reset, no_profiles):
+    """Fill the database with deterministic synthetic venues, artists and shows."""
+    from seed import SCALES, clear_catalog, seed
+    _check_choice(scale, SCALES, '--scale')
+    if reset:
+        clear_catalog()
+    elif db.session.query(Venue.id).first() is not None:
+        raise click.ClickException('The catalog is not empty, use --reset to replace it')
+    started = time.perf_counter()
+    venues, artists, shows = seed(shows or SCALES[scale], seed_value, anchor, not no_profiles)
+    click.echo(f'{venues} venues, {artists} artists, {shows} shows in {time.perf_counter() - started:.1f}s')
+
+@click.command('bench')
+@click.option('--iterations', '-n', default=20, show_default=True, help='Timed requests per route.')
+@click.option('--warmup', default=2, show_default=True)
+@click.option('--route', 'only', multiple=True, help='Only routes containing this text (repeatable).')
+@click.option('--cache', 'use_cache', is_flag=True, help='Keep the response cache on.')
+@click.option('--output', '-o', default='bench-results.json', show_default=True)
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier results to compare with.')
+@click.option('--tolerance', default=0.2, show_default=True, help='Allowed latency/memory increase over the baseline.')
+@with_appcontext
+def bench_command(iterations, warmup, only, use_cache, output, baseline, tolerance):
+    """Benchmark every route: latency percentiles, SQL queries and peak memory.
+
+    With --baseline, exits with status 1 when a route regressed.
+    """
+    from bench import compare, load_results, run_benchmarks, write_results
+    results = run_benchmarks(current_app._get_current_object(), iterations, warmup, only, use_cache)
+    write_results(results, output)
+    click.echo(f"{'route':45} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9}")
+    for name, route in results['routes'].items():
+        click.echo(f"{name:45} {route['p50_ms']:9.2f} {route['p90_ms']:9.2f} {route['p99_ms']:9.2f} "
+                   f"{route['queries']:8} {route['peak_memory_kb']:9.1f}")
+    click.echo(f'Results written to {output}')
+    if baseline:
+        regressions = [row for row in compare(results, load_results(baseline), tolerance) if row[4]]
+        for name, metric, before, after, _ in regressions:
+            click.echo(f'REGRESSION {name} {metric}: {before} -> {after}')
+        if regressions:
+            sys.exit(1)
+        click.echo('No regressions against the baseline')
+
+
+COMMANDS = (
+    count_queries_command,
+    explain_command,
+    cache_command,
+    profiles_command,
+    counts_command,
+    shows_command,
+    search_command,
+    assets_command,
+    worker_command,
+    import_command,
+    export_command,
+    seed_command,
+    bench_command,
+)
+
+
+def register_commands(app):
+    for command in COMMANDS:
+        app.cli.add_command(command)
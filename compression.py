@@ -0,0 +1,204 @@
+import threading
+import time
+import zlib
+from flask import current_app, jsonify, request
+from werkzeug.http import parse_accept_header
+
+#----------------------------------------------------------------------------#
+# Response compression (WSGI middleware)
+# - gzip, or brotli when the optional brotli package is installed and the
+#   client accepts it, for text responses (HTML, JSON, NDJSON, CSV...)
+# - Responses with a Content-Length under COMPRESSION_MIN_SIZE, partial
+#   and HEAD responses, and anything that already has a Content-Encoding
+#   (the precompressed static bundles) are passed through
+# - The body is compressed chunk by chunk as the app yields it; streamed
+#   responses (no Content-Length) are flushed after every chunk so clients
+#   still get rows as they are produced
+# - Per route, for the compressed responses: bytes before/after and the
+#   time spent compressing, at /debug/compression (on in debug mode)
+#----------------------------------------------------------------------------#
+
+ROUTE_KEY = 'fyyur.route'
+MIMETYPES = ('text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript', 'application/javascript',
+             'application/json', 'application/x-ndjson', 'application/xml', 'image/svg+xml')
+
+
+class RouteStats:
+    def __init__(self):
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'responses': self.responses,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            'compress_ms': round(self.seconds * 1000, 2),
+        }
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits 31: gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush):
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, brotli, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush):
+        out = self._compressor.process(data)
+        return out + self._compressor.flush() if flush else out
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, config):
+        self.wsgi_app = wsgi_app
+        self.min_size = config.get('COMPRESSION_MIN_SIZE', 500)
+        self.level = config.get('COMPRESSION_LEVEL', 6)
+        self.brotli_quality = config.get('COMPRESSION_BROTLI_QUALITY', 4)
+        self.mimetypes = tuple(config.get('COMPRESSION_MIMETYPES') or MIMETYPES)
+        self.brotli = _brotli()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _encoding(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if self.brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressible_type(self, headers):
+        values = {name.lower(): value for name, value in headers}
+        return values.get('content-type', '').split(';')[0].strip().startswith(self.mimetypes)
+
+    def _compressible(self, status, headers):
+        if not status.startswith('200'):
+            return False
+        values = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in values or 'no-transform' in values.get('cache-control', ''):
+            return False
+        length = values.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            return _Brotli(self.brotli, self.brotli_quality)
+        return _Gzip(self.level)
+
+    def _record(self, route, bytes_in, bytes_out, seconds):
+        with self._lock:
+            stats = self.stats.setdefault(route, RouteStats())
+            stats.responses += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.seconds += seconds
+
+    def __call__(self, environ, start_response):
+        encoding = self._encoding(environ)
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            if not self._compressible_type(headers):
+                return start_response(status, headers, exc_info)
+            # Compressed or not, the body depends on Accept-Encoding: shared
+            # caches must not hand one client's variant to another
+            headers = _vary_on_encoding(headers)
+            if encoding is not None and self._compressible(status, headers):
+                streamed = not any(name.lower() == 'content-length' for name, _ in headers)
+                state['compressor'] = self._compressor(encoding)
+                state['streamed'] = streamed
+                headers = [(name, _weak_etag(value) if name.lower() == 'etag' else value)
+                           for name, value in headers if name.lower() != 'content-length']
+                headers.append(('Content-Encoding', encoding))
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if 'compressor' not in state:
+            return app_iter
+        return self._compress(environ, app_iter, state['compressor'], state['streamed'])
+
+    def _compress(self, environ, app_iter, compressor, streamed):
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        try:
+            for chunk in app_iter:
+                started = time.perf_counter()
+                out = compressor.compress(chunk, streamed)
+                seconds += time.perf_counter() - started
+                bytes_in += len(chunk)
+                bytes_out += len(out)
+                if out:
+                    yield out
+            started = time.perf_counter()
+            out = compressor.finish()
+            seconds += time.perf_counter() - started
+            bytes_out += len(out)
+            yield out
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            self._record(environ.get(ROUTE_KEY, 'unmatched'), bytes_in, bytes_out, seconds)
+
+
+def _vary_on_encoding(headers):
+    # Adds Accept-Encoding to the Vary header, keeping what is there
+    vary = [value for name, value in headers if name.lower() == 'vary']
+    fields = {field.strip().lower() for value in vary for field in value.split(',')}
+    if 'accept-encoding' in fields or '*' in fields:
+        return headers
+    headers = [(name, value) for name, value in headers if name.lower() != 'vary']
+    return headers + [('Vary', ', '.join(vary + ['Accept-Encoding']))]
+
+
+def _weak_etag(value):
+    # The compressed body is a different representation of the same page
+    return value if value.startswith('W/') else 'W/' + value
+
+
+def _tag_route():
+    # Lets the middleware group its numbers by route
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    request.environ[ROUTE_KEY] = f'{request.method} {rule}'
+
+
+def debug_compression():
+    stats = current_app.extensions['compression'].stats
+    return jsonify({route: route_stats.as_dict() for route, route_stats in sorted(stats.items())})
+
+
+def init_compression(app):
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+    middleware = CompressionMiddleware(app.wsgi_app, app.config)
+    app.wsgi_app = middleware
+    app.extensions['compression'] = middleware
+    app.before_request(_tag_route)
+    if app.config.get('COMPRESSION_DEBUG_ENDPOINT'):
+        app.add_url_rule('/debug/compression', 'debug_compression', debug_compression)
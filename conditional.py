@@ -0,0 +1,82 @@
+import hashlib
+import os
+from datetime import timezone
+from functools import wraps
+from flask import current_app, make_response, request
+from cache import cacheable_request, entity_modified, entity_versions
+
+#----------------------------------------------------------------------------#
+# Conditional GET
+# - ETag and Last-Modified come from the entity version counters (one small
+#   query per request), so they are known before the view runs
+# - A matching If-None-Match / If-Modified-Since gets a 304 without any
+#   page query or template rendering
+# - The ETag also covers the templates, so a deploy that changes a page
+#   changes its ETag
+#----------------------------------------------------------------------------#
+
+def _templates_digest(app):
+    # Computed once per process from the template files' names, sizes and mtimes
+    if 'templates_digest' not in app.extensions:
+        digest = hashlib.sha1(app.config.get('ETAG_SALT', '').encode())
+        folder = os.path.join(app.root_path, app.template_folder)
+        for root, _, files in sorted(os.walk(folder)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        app.extensions['templates_digest'] = digest.hexdigest()
+    return app.extensions['templates_digest']
+
+
+def page_etag(entities, variant=''):
+    versions = entity_versions()
+    key = request.full_path + '|' + variant + '|' + _templates_digest(current_app) + '|' + \
+        ','.join(f'{entity}={versions[entity]}' for entity in entities)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def page_last_modified(entities):
+    times = [time for entity, time in entity_modified().items() if entity in entities and time is not None]
+    if not times:
+        return None
+    # Stored as naive local time
+    return max(times).astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        # Weak comparison: compressed responses carry a weak ETag (compression.py)
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(*entities, variant=None):
+    # Answer GETs with 304 Not Modified when none of the entities the page
+    # depends on changed since the client's copy. variant: for a URL served
+    # in several formats, returns the one chosen from the Accept header; it
+    # goes into the ETag and the response varies on Accept.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not cacheable_request():
+                return view(*args, **kwargs)
+            etag = page_etag(entities, variant() if variant is not None else '')
+            last_modified = page_last_modified(entities)
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if variant is not None:
+                response.vary.add('Accept')
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Clients and the CDN may keep the page but must revalidate it
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
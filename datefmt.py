@@ -0,0 +1,55 @@
+from datetime import datetime
+from functools import lru_cache
+
+#----------------------------------------------------------------------------#
+# Date formatting (the `datetime` template filter)
+# - Takes datetime objects; ISO strings (artist profile documents are JSON)
+#   are read with datetime.fromisoformat, no dateutil
+# - The Babel locale and compiled pattern are looked up once per
+#   (locale, format) and reused for every row
+# - Stored times are naive server-local; with a time zone name (a venue's
+#   `timezone`) they are shown in that zone
+#----------------------------------------------------------------------------#
+
+FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+DEFAULT_LOCALE = 'en'
+
+
+@lru_cache(maxsize=64)
+def _formatter(locale, format):
+    # Babel is slow to import, load it on first use
+    from babel import Locale
+    from babel.dates import parse_pattern
+    locale = Locale.parse(locale)
+    pattern = parse_pattern(FORMATS.get(format, format))
+    return lambda value: pattern.apply(value, locale)
+
+
+@lru_cache(maxsize=256)
+def get_timezone(name):
+    # pytz zone for an IANA name, None when empty or unknown
+    import pytz
+    try:
+        return pytz.timezone(name) if name else None
+    except pytz.UnknownTimeZoneError:
+        return None
+
+
+def to_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.rstrip('Z'))
+    return value
+
+
+def format_datetime(value, format='medium', timezone=None, locale=DEFAULT_LOCALE):
+    # format: 'full', 'medium' or a Babel pattern
+    if value is None or value == '':
+        return ''
+    value = to_datetime(value)
+    zone = get_timezone(timezone)
+    if zone is not None:
+        value = value.astimezone(zone)
+    return _formatter(locale, format)(value)
@@ -0,0 +1,93 @@
+import json
+import re
+from models import db
+from instrumentation import count_queries
+
+#----------------------------------------------------------------------------#
+# Query plan checks
+# - Replays the SELECTs issued by each route under EXPLAIN and reports the
+#   tables read with a sequential scan
+# - On PostgreSQL enable_seqscan is switched off for the check, so that a
+#   seq scan left in a plan means no index can serve the query at all (small
+#   tables are otherwise seq scanned whatever the indexes)
+#----------------------------------------------------------------------------#
+
+# Routes to check when none are given: every parameterless GET route plus
+# the detail pages and searches
+DEFAULT_PATHS = (
+    '/venues',
+    '/venues/1',
+    '/venues/search?search_term=a',
+    '/venues/search?search_term=jazz',
+    '/venues/genres/Jazz',
+    '/artists',
+    '/artists/1',
+    '/artists/search?search_term=jazz',
+    '/artists/genres/Jazz',
+    '/shows',
+)
+
+# SQLite: "SCAN Show" is a full table scan; "SCAN Show USING INDEX ..." and
+# virtual (FTS) tables are fine
+SQLITE_SEQ_SCAN = re.compile(r'^SCAN (\S+)$')
+
+
+def _postgres_seq_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    tables = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            tables.append(node.get('Relation Name'))
+        nodes.extend(node.get('Plans', []))
+    return tables
+
+
+def _sqlite_seq_scans(connection, statement, parameters):
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    tables = []
+    for row in rows:
+        match = SQLITE_SEQ_SCAN.match(row[-1])
+        if match:
+            tables.append(match.group(1))
+    return tables
+
+
+def explain_statements(executions):
+    # [(statement, [seq scanned tables])] for every SELECT
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        seq_scans = _postgres_seq_scans
+    elif dialect == 'sqlite':
+        seq_scans = _sqlite_seq_scans
+    else:
+        raise RuntimeError(f'EXPLAIN checks are not supported on {dialect}')
+
+    report = []
+    with db.engine.connect() as connection:
+        # Rolled back so the SET LOCAL never leaks into the pool
+        transaction = connection.begin()
+        try:
+            if dialect == 'postgresql':
+                connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            for statement, parameters in executions:
+                if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    continue
+                report.append((statement, seq_scans(connection, statement, parameters)))
+        finally:
+            transaction.rollback()
+    return report
+
+
+def explain_routes(app, paths=None):
+    # {path: [(statement, [seq scanned tables])]} for the given GET paths
+    client = app.test_client()
+    results = {}
+    for path in paths or DEFAULT_PATHS:
+        with count_queries() as counter:
+            client.get(path)
+        results[path] = explain_statements(counter.executions)
+    return results
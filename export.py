@@ -0,0 +1,159 @@
+import csv
+import hmac
+import io
+import zlib
+from datetime import datetime
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from models import Venue, Artist, Show, venue_genres, artist_genres, db
+from queries import genre_names_by_id
+from api import batches, row_encoder
+
+#----------------------------------------------------------------------------#
+# Catalog export (`flask export`, /admin/export/<kind>)
+# - Rows are read through a server-side cursor (yield_per) and written out
+#   batch by batch, so memory stays flat whatever the table size
+# - NDJSON or CSV, optionally gzipped; the fields match what `flask import`
+#   reads, so an export can be loaded into another database
+# - since=<time> only exports the rows whose updated_at is later (deleted
+#   rows are not reported)
+#----------------------------------------------------------------------------#
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+EXPORT_BATCH = 1000
+KINDS = ('venues', 'artists', 'shows')
+
+# kind: (model, columns, genre association table, association column)
+EXPORTS = {
+    'venues': (Venue, (Venue.id, Venue.name, Venue.city, Venue.state, Venue.address, Venue.phone,
+                       Venue.image_link, Venue.facebook_link, Venue.website, Venue.seeking_talent,
+                       Venue.seeking_description, Venue.timezone, Venue.updated_at),
+               venue_genres, venue_genres.c.venue_id),
+    'artists': (Artist, (Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone, Artist.image_link,
+                         Artist.facebook_link, Artist.website, Artist.seeking_venue, Artist.seeking_description,
+                         Artist.updated_at),
+                artist_genres, artist_genres.c.artist_id),
+    'shows': (Show, (Show.id, Show.artist_id, Show.venue_id, Show.start_time, Show.updated_at), None, None),
+}
+
+MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        # The format ShowForm parses
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, list):
+        return ','.join(value)
+    return value
+
+
+class CatalogExport:
+    # Iterating yields the encoded export in chunks (bytes); rows counts
+    # the rows written so far
+    def __init__(self, kind, format='ndjson', since=None, compress=False, batch_size=EXPORT_BATCH):
+        if kind not in EXPORTS:
+            raise ValueError(f'Unknown export kind {kind!r}')
+        if format not in MIMETYPES:
+            raise ValueError(f'Unknown export format {format!r}')
+        self.kind = kind
+        self.format = format
+        self.since = since
+        self.compress = compress
+        self.batch_size = batch_size
+        self.rows = 0
+
+    @property
+    def mimetype(self):
+        return 'application/gzip' if self.compress else MIMETYPES[self.format]
+
+    @property
+    def filename(self):
+        return f'{self.kind}.{self.format}' + ('.gz' if self.compress else '')
+
+    def _batches(self):
+        model, columns, association, link = EXPORTS[self.kind]
+        query = db.session.query(*columns)
+        if self.since is not None:
+            query = query.filter(model.updated_at > self.since)
+        for batch in batches(query.order_by(model.id).yield_per(self.batch_size), self.batch_size):
+            if association is not None:
+                genres = genre_names_by_id(association, link, [row.id for row in batch])
+                batch = [(*row, genres.get(row.id, [])) for row in batch]
+            self.rows += len(batch)
+            yield batch
+
+    def _fields(self):
+        _, columns, association, _ = EXPORTS[self.kind]
+        return [column.key for column in columns] + (['genres'] if association is not None else [])
+
+    def _text_chunks(self):
+        fields = self._fields()
+        if self.format == 'ndjson':
+            encode = row_encoder(fields)
+            for batch in self._batches():
+                yield ''.join(encode(row) + '\n' for row in batch)
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for batch in self._batches():
+            writer.writerows([_csv_value(value) for value in row] for row in batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def __iter__(self):
+        chunks = (chunk.encode() for chunk in self._text_chunks())
+        if not self.compress:
+            yield from chunks
+            return
+        # gzip framing (wbits 31), compressed as it goes
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def parse_since(value):
+    # ISO 8601, as written in the exports (a trailing Z is ignored)
+    return datetime.fromisoformat(value.rstrip('Z')) if value else None
+
+
+#  Admin endpoint
+#  ----------------------------------------------------------------
+
+def _authorized():
+    token = current_app.config.get('ADMIN_TOKEN')
+    if not token:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    # As bytes: compare_digest rejects non-ASCII str
+    return hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+
+
+@admin.route('/export/<kind>')
+def export_catalog(kind):
+    # /admin/export/venues?format=csv&gzip=1&since=2026-10-01T00:00:00
+    if not _authorized():
+        abort(404)
+    format = request.args.get('format', 'ndjson')
+    if kind not in EXPORTS or format not in MIMETYPES:
+        abort(404)
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        abort(400)
+    export = CatalogExport(kind, format, since, compress=request.args.get('gzip') in ('1', 'true'))
+    response = Response(stream_with_context(iter(export)), mimetype=export.mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={export.filename}'
+    return response
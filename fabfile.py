@@ -5,9 +5,11 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    # Route benchmarks against a local baseline, recorded once with
+    # `flask seed && flask bench -o bench-baseline.json`
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "FLASK_APP=app.py flask bench --baseline bench-baseline.json", capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
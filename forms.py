@@ -1,7 +1,12 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import DataRequired, AnyOf, URL, Optional, ValidationError
+from datefmt import get_timezone
+
+def valid_timezone(form, field):
+    if field.data and get_timezone(field.data) is None:
+        raise ValidationError('Unknown time zone, use a name like America/New_York')
 
 class ShowForm(FlaskForm):
     artist_id = StringField(
@@ -126,6 +131,10 @@ class VenueForm(FlaskForm):
         'seeking_description'
     )
 
+    timezone = StringField(
+        'timezone', validators=[Optional(), valid_timezone]
+    )
+
 
 
 class ArtistForm(FlaskForm):
@@ -0,0 +1,370 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from sqlalchemy import func, text
+from werkzeug.datastructures import MultiDict
+from forms import VenueForm, ArtistForm, ShowForm
+from models import Venue, Artist, Show, Genre, venue_genres, artist_genres, db
+from search import index_rows
+from profiles import refresh_artist_profile
+from cache import bump_versions
+from show_counts import count_shows
+from partitions import ensure_partitions_for
+
+#----------------------------------------------------------------------------#
+# Bulk import (`flask import`)
+# - Reads CSV (header row) or NDJSON records and validates each one with the
+#   same form class the create pages use, so the rules stay in forms.py
+# - Rows are written in batches: duplicate names and unknown venue/artist
+#   ids are resolved with one IN query per batch, then the batch goes in
+#   with COPY on PostgreSQL and executemany elsewhere, one commit per batch
+# - Search rows, artist profiles and cache versions are updated in bulk
+#----------------------------------------------------------------------------#
+
+DEFAULT_BATCH_SIZE = 10000
+# Keeps IN lists under SQLite's bound parameter limit
+IN_CHUNK = 900
+MAX_REPORTED_ERRORS = 20
+FALSE_VALUES = ('', '0', 'false', 'no', 'n', 'off')
+
+
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.inserted + self.duplicates + self.invalid
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'line {line}: {message}')
+
+    def summary(self):
+        return (f'{self.kind}: {self.inserted} inserted, {self.duplicates} duplicate(s), {self.invalid} invalid '
+                f'in {self.elapsed:.1f}s ({self.rate:.0f} rows/s)')
+
+
+#  Reading and validation
+#  ----------------------------------------------------------------
+
+def detect_format(filename):
+    return 'ndjson' if filename.endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+def read_records(file, format):
+    # (line number, record) pairs; record is None when the line can't be parsed
+    if format == 'ndjson':
+        for line, content in enumerate(file, 1):
+            if not content.strip():
+                continue
+            try:
+                record = json.loads(content)
+            except ValueError:
+                record = None
+            yield line, record if isinstance(record, dict) else None
+    else:
+        # Line 1 is the header
+        for line, record in enumerate(csv.DictReader(file), 2):
+            yield line, record
+
+
+def _formdata(record):
+    # Record values as the form would receive them from a browser
+    data = MultiDict()
+    for key, value in record.items():
+        if value is None:
+            continue
+        if key == 'genres':
+            names = value if isinstance(value, list) else value.split(',')
+            for name in names:
+                data.add(key, name.strip())
+        elif key in ('seeking_talent', 'seeking_venue'):
+            # An unticked checkbox is simply not posted
+            if str(value).strip().lower() not in FALSE_VALUES:
+                data.add(key, 'y')
+        elif key == 'website':
+            data.add('website_link', value)
+        elif key == 'start_time':
+            # Also accept ISO 8601 as written by the API
+            data.add(key, str(value).replace('T', ' ').rstrip('Z').split('.')[0])
+        else:
+            data.add(key, str(value))
+    return data
+
+
+def _errors(form):
+    return '; '.join(f'{field}: {", ".join(messages)}' for field, messages in form.errors.items())
+
+
+def _validate(form, record):
+    # Returns an error message, or None when the form accepts the record
+    if record is None:
+        return 'unreadable record'
+    formdata = _formdata(record)
+    form.process(formdata)
+    if not form.validate():
+        return _errors(form)
+    return None
+
+
+#  Writing
+#  ----------------------------------------------------------------
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _existing(column, values):
+    # The subset of values present in column
+    found = set()
+    for chunk in _chunks(values, IN_CHUNK):
+        found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def allocate_ids(model, count):
+    # Primary keys for rows written without RETURNING, so their genre
+    # association rows can be written in the same batch
+    if _dialect() == 'postgresql':
+        rows = db.session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {'table': f'"{model.__tablename__}"', 'count': count}
+        )
+        return [id for (id,) in rows]
+    # SQLite has a single writer; imports are expected to run while the site
+    # isn't creating rows of the same kind
+    start = db.session.query(func.coalesce(func.max(model.id), 0)).scalar() + 1
+    return list(range(start, start + count))
+
+
+def _copy(table, rows):
+    # COPY ... FROM STDIN over the session's connection (same transaction)
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer)
+    finally:
+        cursor.close()
+
+
+def bulk_insert(table, rows):
+    # rows: list of dicts with the same keys
+    if not rows:
+        return
+    if _dialect() == 'postgresql':
+        _copy(table, rows)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+def insert_shows(rows, now=None):
+    # bulk_insert() for shows, adding them to their venue and artist counters
+    now = now or datetime.now()
+    for row in rows:
+        row['upcoming'] = row['start_time'] > now
+    ensure_partitions_for(row['start_time'] for row in rows)
+    bulk_insert(Show.__table__, rows)
+    count_shows((row['venue_id'], row['artist_id'], row['upcoming']) for row in rows)
+
+
+#  Entities
+#  ----------------------------------------------------------------
+
+def _venue_row(form, now):
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'address': form.address.data,
+        'phone': form.phone.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website': form.website_link.data,
+        'seeking_talent': form.seeking_talent.data,
+        'seeking_description': form.seeking_description.data if form.seeking_talent.data else None,
+        'timezone': form.timezone.data or None,
+        'updated_at': now
+    }
+
+
+def _artist_row(form, now):
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'phone': form.phone.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website': form.website_link.data,
+        'seeking_venue': form.seeking_venue.data,
+        'seeking_description': form.seeking_description.data if form.seeking_venue.data else None,
+        'updated_at': now
+    }
+
+
+def _show_row(form, now):
+    return {
+        'artist_id': int(form.artist_id.data),
+        'venue_id': int(form.venue_id.data),
+        'start_time': form.start_time.data,
+        'updated_at': now
+    }
+
+
+class EntityLoader:
+    # Venues and artists: names are unique, genres go to the association table
+    def __init__(self, key, model, form_class, to_row, association, link):
+        self.key = key
+        self.model = model
+        self.form_class = form_class
+        self.to_row = to_row
+        self.association = association
+        self.link = link
+
+    def check(self, form, record):
+        return None
+
+    def load(self, batch, report):
+        # batch: [(line, row, genre names)]
+        existing = _existing(self.model.name, {row['name'] for _, row, _ in batch})
+        fresh = []
+        for line, row, genres in batch:
+            if row['name'] in existing:
+                report.duplicates += 1
+                continue
+            existing.add(row['name'])
+            fresh.append((row, genres))
+        if not fresh:
+            return
+
+        genre_ids = {genre.name: genre.id for genre in self._genres(fresh)}
+        links = []
+        for (row, genres), id in zip(fresh, allocate_ids(self.model, len(fresh))):
+            row['id'] = id
+            links.extend({self.link.name: id, 'genre_id': genre_ids[name]} for name in genres)
+        bulk_insert(self.model.__table__, [row for row, _ in fresh])
+        bulk_insert(self.association, links)
+        index_rows(self.key, [dict(row, genres=genres) for row, genres in fresh])
+        db.session.commit()
+        report.inserted += len(fresh)
+
+    def _genres(self, fresh):
+        genres = Genre.from_names({name for _, names in fresh for name in names})
+        db.session.flush()
+        return genres
+
+    def finish(self):
+        bump_versions(self.key)
+        db.session.commit()
+
+
+class ShowLoader:
+    key = 'show'
+    form_class = ShowForm
+
+    def __init__(self):
+        self.artist_ids = set()
+
+    def to_row(self, form, now):
+        return _show_row(form, now)
+
+    def check(self, form, record):
+        # The form has a start_time default (for the page); an import must say when
+        if not record.get('start_time'):
+            return 'start_time: This field is required.'
+        for field in (form.artist_id, form.venue_id):
+            try:
+                int(field.data)
+            except (TypeError, ValueError):
+                return f'{field.name}: Not a valid integer.'
+        return None
+
+    def load(self, batch, report):
+        artists = _existing(Artist.id, {row['artist_id'] for _, row, _ in batch})
+        venues = _existing(Venue.id, {row['venue_id'] for _, row, _ in batch})
+        rows = []
+        for line, row, _ in batch:
+            if row['artist_id'] not in artists:
+                report.reject(line, f'artist_id: no artist {row["artist_id"]}')
+            elif row['venue_id'] not in venues:
+                report.reject(line, f'venue_id: no venue {row["venue_id"]}')
+            else:
+                rows.append(row)
+        insert_shows(rows)
+        db.session.commit()
+        report.inserted += len(rows)
+        self.artist_ids.update(row['artist_id'] for row in rows)
+
+    def finish(self):
+        # The profiles of the artists that got shows
+        for chunk in _chunks(self.artist_ids, 500):
+            for artist_id in chunk:
+                refresh_artist_profile(artist_id)
+            db.session.commit()
+        # insert_shows changed the venue and artist show counters too
+        bump_versions('show', 'venue', 'artist')
+        db.session.commit()
+
+
+def _loader(kind):
+    if kind == 'venues':
+        return EntityLoader('venue', Venue, VenueForm, _venue_row, venue_genres, venue_genres.c.venue_id)
+    if kind == 'artists':
+        return EntityLoader('artist', Artist, ArtistForm, _artist_row, artist_genres, artist_genres.c.artist_id)
+    if kind == 'shows':
+        return ShowLoader()
+    raise ValueError(f'Unknown import kind {kind!r}')
+
+
+def import_records(kind, records, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    # records: iterable of (line, record dict); progress(report) is called
+    # after every batch. Returns an ImportReport.
+    loader = _loader(kind)
+    report = ImportReport(kind)
+    form = loader.form_class(formdata=None, meta={'csrf': False})
+    started = time.perf_counter()
+    now = datetime.now()
+    batch = []
+    for line, record in records:
+        error = _validate(form, record) or loader.check(form, record)
+        if error:
+            report.reject(line, error)
+            continue
+        genres = list(dict.fromkeys(form.genres.data)) if 'genres' in form else []
+        batch.append((line, loader.to_row(form, now), genres))
+        if len(batch) >= batch_size:
+            loader.load(batch, report)
+            batch = []
+            report.elapsed = time.perf_counter() - started
+            if progress:
+                progress(report)
+    if batch:
+        loader.load(batch, report)
+    loader.finish()
+    report.elapsed = time.perf_counter() - started
+    return report
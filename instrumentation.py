@@ -0,0 +1,186 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from models import db
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Query counting
+# - Used to keep an eye on how many statements a view issues, so list pages
+#   stay bounded as the catalog grows
+#----------------------------------------------------------------------------#
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+        # (statement, parameters) as sent to the driver, used by `flask explain`
+        self.executions = []
+        self.thread = threading.get_ident()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        # Only the statements of the counting thread, not e.g. job workers
+        if threading.get_ident() != self.thread:
+            return
+        self.statements.append(statement)
+        if not executemany:
+            self.executions.append((statement, parameters))
+
+
+def bound_engines():
+    # The primary and the replica binds (GET requests read from a replica)
+    binds = current_app.config.get('SQLALCHEMY_BINDS') or {}
+    return [db.engine] + [db.get_engine(bind=key) for key in binds]
+
+
+@contextmanager
+def count_queries(engine=None):
+    # Count every statement this thread sends to the database inside the
+    # block, on every bound engine unless one is given
+    engines = [engine] if engine is not None else bound_engines()
+    counter = QueryCounter()
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', counter)
+
+
+#----------------------------------------------------------------------------#
+# Per-request SQL statistics
+# - Every statement run while handling a request is counted and timed, and
+#   grouped by its shape (the SQL with literals and parameters replaced),
+#   which is how an N+1 loop shows up: one shape, many executions
+# - Server-Timing header on each response ("db" and "app" durations)
+# - A warning is logged when a shape runs more than SQL_REPEAT_THRESHOLD
+#   times in one request
+# - /debug/queries lists the stats of the last requests (debug mode, or
+#   SQL_DEBUG_ENDPOINT = True)
+#----------------------------------------------------------------------------#
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|:\w+|\?")
+_PARAMETER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    # SQL with literals/parameters as ? and IN lists collapsed to (?)
+    shape = _LITERALS.sub('?', statement)
+    shape = _PARAMETER_LISTS.sub('(?)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class RequestQueryStats:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.count = 0
+        # Seconds spent in the database
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.shape_durations = Counter()
+
+    def record(self, statement, duration):
+        shape = statement_shape(statement)
+        self.count += 1
+        self.duration += duration
+        self.shapes[shape] += 1
+        self.shape_durations[shape] += duration
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def repeated(self, threshold):
+        # [(shape, count)] of the shapes run more than threshold times
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self):
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries", app;dur={self.elapsed * 1000:.2f}'
+
+    def as_dict(self):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'queries': self.count,
+            'db_ms': round(self.duration * 1000, 3),
+            'total_ms': round((self.elapsed or 0) * 1000, 3),
+            'statements': [{
+                'shape': shape,
+                'count': count,
+                'db_ms': round(self.shape_durations[shape] * 1000, 3)
+            } for shape, count in self.shapes.most_common()]
+        }
+
+
+def _current_stats():
+    if has_request_context():
+        return g.get('sql_stats')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    stats = _current_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def _start_request():
+    g.sql_stats = RequestQueryStats(request.method, request.full_path.rstrip('?'))
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    stats.finish()
+    response.headers['Server-Timing'] = stats.server_timing()
+    threshold = current_app.config.get('SQL_REPEAT_THRESHOLD', 10)
+    for shape, count in stats.repeated(threshold):
+        log.warning('%s %s ran the same statement %d times (possible N+1): %s',
+                    stats.method, stats.path, count, shape)
+    current_app.extensions['sql_stats'].append(stats)
+    return response
+
+
+def debug_queries():
+    # The stats of the most recent requests, newest first
+    return jsonify([stats.as_dict() for stats in reversed(current_app.extensions['sql_stats'])])
+
+
+def init_instrumentation(app):
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    app.extensions['sql_stats'] = deque(maxlen=app.config.get('SQL_STATS_HISTORY', 50))
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if app.config.get('SQL_DEBUG_ENDPOINT', app.debug):
+        app.add_url_rule('/debug/queries', 'debug_queries', debug_queries)
@@ -0,0 +1,258 @@
+import importlib
+import logging
+import threading
+import traceback
+from datetime import datetime, timedelta
+import click
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import and_, or_
+from models import Job, db
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Background jobs
+# - enqueue() adds a Job row to the current session, so the job is committed
+#   (or rolled back) with the write that asked for it
+# - Workers claim due jobs with a conditional UPDATE (one winner per job,
+#   on SQLite and PostgreSQL alike), run the task, and delete the job in
+#   the same transaction as the task's own changes
+# - A failing job is retried with exponential backoff, then kept as
+#   'failed' with its traceback. A job whose worker died is picked up
+#   again once its lock (JOBS_TIMEOUT) expires: tasks must be idempotent.
+# - Workers run as threads in the web process (JOBS_IN_PROCESS_THREADS) or
+#   in a separate `flask worker` process
+# - The tasks of JOBS_SCHEDULE run periodically: a worker queues them when
+#   it starts, and each run queues the next one
+#----------------------------------------------------------------------------#
+
+# name: function(**payload), see tasks.py
+TASKS = {}
+CLAIM_BATCH = 10
+MAX_RETRY_DELAY = 3600
+
+
+def task(name):
+    def decorator(function):
+        TASKS[name] = function
+        return function
+    return decorator
+
+
+def enqueue(name, delay=0, **payload):
+    # Stage a job; the caller commits. payload must be JSON serializable.
+    if name not in TASKS:
+        raise KeyError(f'Unknown task {name!r}')
+    job = Job(name=name, payload=payload, status='queued', attempts=0,
+              max_attempts=current_app.config.get('JOBS_MAX_ATTEMPTS', 5),
+              run_at=datetime.now() + timedelta(seconds=delay))
+    db.session.add(job)
+    if has_request_context():
+        g.jobs_enqueued = True
+    return job
+
+
+def _pending(name, statuses=('queued',)):
+    return Job.query.filter(Job.name == name, Job.status.in_(statuses)).first() is not None
+
+
+def schedule_periodic():
+    # Queue the JOBS_SCHEDULE tasks that aren't queued or running yet; the
+    # caller commits
+    for name in current_app.config.get('JOBS_SCHEDULE', {}):
+        if not _pending(name, ('queued', 'running')):
+            enqueue(name)
+
+
+#  Running jobs
+#  ----------------------------------------------------------------
+
+def _due(now):
+    return or_(and_(Job.status == 'queued', Job.run_at <= now),
+               and_(Job.status == 'running', Job.locked_until < now))
+
+
+def claim(now=None):
+    # The next due job, marked running by this worker; None when idle
+    now = now or datetime.now()
+    timeout = timedelta(seconds=current_app.config.get('JOBS_TIMEOUT', 300))
+    candidates = db.session.query(Job.id).filter(_due(now)).order_by(Job.run_at, Job.id).limit(CLAIM_BATCH).all()
+    for (job_id,) in candidates:
+        claimed = Job.query.filter(Job.id == job_id, _due(now)).update({
+            Job.status: 'running',
+            Job.attempts: Job.attempts + 1,
+            Job.locked_until: now + timeout,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return Job.query.get(job_id)
+    return None
+
+
+def _retry_delay(attempts):
+    base = current_app.config.get('JOBS_RETRY_DELAY', 10)
+    return min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def run_job(job):
+    # Returns True when the task succeeded
+    job_id, name, payload = job.id, job.name, dict(job.payload)
+    try:
+        function = TASKS.get(name)
+        if function is None:
+            raise LookupError(f'Unknown task {name!r}')
+        function(**payload)
+        db.session.delete(job)
+        interval = current_app.config.get('JOBS_SCHEDULE', {}).get(name)
+        if interval and not _pending(name):
+            enqueue(name, interval)
+        db.session.commit()
+        log.debug('Job %d %s done', job_id, name)
+        return True
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()
+        job = Job.query.get(job_id)
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            log.error('Job %d %s failed after %d attempts', job_id, name, job.attempts, exc_info=True)
+        else:
+            job.status = 'queued'
+            job.run_at = datetime.now() + timedelta(seconds=_retry_delay(job.attempts))
+            log.warning('Job %d %s failed (attempt %d), retrying at %s', job_id, name, job.attempts, job.run_at,
+                        exc_info=True)
+        job.locked_until = None
+        job.last_error = error
+        db.session.commit()
+        return False
+
+
+def work_once():
+    # Runs one due job; False when there was none
+    job = claim()
+    if job is None:
+        return False
+    run_job(job)
+    return True
+
+
+def run_due_jobs():
+    # Every job due now, then return (`flask worker --burst`)
+    schedule_periodic()
+    db.session.commit()
+    count = 0
+    while work_once():
+        count += 1
+    return count
+
+
+def requeue_failed():
+    count = Job.query.filter(Job.status == 'failed').update({
+        Job.status: 'queued', Job.attempts: 0, Job.run_at: datetime.now()
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+#  Worker threads
+#  ----------------------------------------------------------------
+
+class WorkerPool:
+    def __init__(self, app, threads, poll_interval=1.0):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+
+    def start(self):
+        for number in range(self.threads):
+            worker = threading.Thread(target=self._run, args=(number == 0,), name=f'job-worker-{number}',
+                                      daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def wake(self):
+        # New jobs were committed; don't wait for the next poll
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        # Lets the running jobs finish
+        self._stopping.set()
+        self._wake.set()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def wait(self):
+        while not self._stopping.wait(1):
+            pass
+
+    def _run(self, first):
+        if first:
+            with self.app.app_context():
+                try:
+                    schedule_periodic()
+                    db.session.commit()
+                except Exception:
+                    log.exception('Cannot schedule the periodic jobs')
+                finally:
+                    db.session.remove()
+        while not self._stopping.is_set():
+            with self.app.app_context():
+                try:
+                    ran = work_once()
+                except Exception:
+                    # e.g. the database is unreachable; try again later
+                    log.exception('Job worker error')
+                    ran = False
+                finally:
+                    db.session.remove()
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+#  In-process workers
+#  ----------------------------------------------------------------
+
+_start_lock = threading.Lock()
+
+
+def _serving(app):
+    # Not for the test client: tests, or a CLI command issuing requests
+    # (bench, explain, count-queries), whose query counts the polling
+    # would skew. `flask run` without threads serves inside its command.
+    if app.testing:
+        return False
+    command = click.get_current_context(silent=True)
+    return command is None or command.info_name == 'run'
+
+
+def _start_pool():
+    # On the first request of the process, i.e. after a preforking server
+    # has forked its workers
+    app = current_app._get_current_object()
+    if 'job_pool' in app.extensions or not _serving(app):
+        return
+    with _start_lock:
+        if 'job_pool' not in app.extensions:
+            pool = WorkerPool(app, app.config['JOBS_IN_PROCESS_THREADS'], app.config.get('JOBS_POLL_INTERVAL', 1.0))
+            pool.start()
+            app.extensions['job_pool'] = pool
+
+
+def _wake_pool(response):
+    if g.get('jobs_enqueued') and has_app_context():
+        pool = current_app.extensions.get('job_pool')
+        if pool is not None:
+            pool.wake()
+    return response
+
+
+def init_jobs(app):
+    # The task functions register themselves on import
+    importlib.import_module('tasks')
+    if app.config.get('JOBS_IN_PROCESS_THREADS', 0) > 0:
+        app.before_request(_start_pool)
+        app.after_request(_wake_pool)
@@ -0,0 +1,140 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+
+#----------------------------------------------------------------------------#
+# Logging
+# - Every logger (app, module loggers, sqlalchemy, werkzeug) goes through one
+#   QueueHandler on the root logger; a background listener thread formats
+#   the records and writes them to stderr and LOG_FILE
+# - Messages use %-style arguments and are only formatted on the listener
+#   thread, and only when the level is enabled
+# - The queue is bounded: when it is full records are dropped (and counted)
+#   instead of blocking the request
+# - LOG_LEVEL sets the root level, LOG_LEVELS per module overrides
+#   ("sqlalchemy.engine=INFO,instrumentation=ERROR")
+#----------------------------------------------------------------------------#
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s [in %(pathname)s:%(lineno)d]'
+# Request attributes copied onto records by RequestFilter
+REQUEST_FIELDS = ('method', 'path', 'remote_addr')
+
+_listener = None
+_handler = None
+
+
+class RequestFilter(logging.Filter):
+    # Runs on the calling thread, while the request is still there
+    def filter(self, record):
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+            record.remote_addr = request.remote_addr
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    # One JSON object per line
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in REQUEST_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Hand the record over as is; QueueHandler would format it here, on
+        # the request thread. Pass immutable values as arguments.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(value):
+    # "name=LEVEL,name=LEVEL" -> {name: LEVEL}
+    levels = {}
+    for item in (value or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _targets(config):
+    formatter = JSONFormatter() if config.get('LOG_FORMAT') == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if config.get('LOG_FILE'):
+        handlers.append(logging.FileHandler(config['LOG_FILE']))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _stop():
+    global _listener
+    if _listener is not None:
+        # Writes out what is still queued
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # The listener thread doesn't survive a fork (gunicorn --preload), the
+    # queue and handlers do
+    global _listener
+    if _listener is not None:
+        _listener = QueueListener(_listener.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def init_logging(app):
+    global _listener, _handler
+    config = app.config
+    root = logging.getLogger()
+    # create_app can run more than once in a process (tests, the CLI)
+    if _listener is not None:
+        targets = _listener.handlers
+        _stop()
+        for target in targets:
+            target.close()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    records = queue.Queue(config.get('LOG_QUEUE_SIZE', 10000))
+    _handler = DroppingQueueHandler(records)
+    _handler.addFilter(RequestFilter())
+    root.addHandler(_handler)
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    for name, level in parse_levels(config.get('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(records, *_targets(config), respect_handler_level=True)
+    _listener.start()
+    app.extensions['log_handler'] = _handler
+
+
+atexit.register(_stop)
+os.register_at_fork(after_in_child=_restart_after_fork)
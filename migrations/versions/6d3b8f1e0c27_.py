@@ -0,0 +1,37 @@
+"""add updated_at to Venue, Artist, Show and EntityVersion
+
+Revision ID: 6d3b8f1e0c27
+Revises: 4a6f0d2c8e95
+Create Date: 2026-10-18 18:11:40.275913
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d3b8f1e0c27'
+down_revision = '4a6f0d2c8e95'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show', 'EntityVersion')
+
+
+def upgrade():
+    # Added nullable, backfilled, then made NOT NULL: SQLite can't add a
+    # column with a non-constant default
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Local time, like the model's datetime.now default
+        op.execute(sa.text(f'UPDATE "{table}" SET updated_at = :now').bindparams(now=datetime.now()))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,59 @@
+"""search indexes for venues and artists
+
+Revision ID: 8c4e51b0a2d7
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-18 11:03:27.540911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e51b0a2d7'
+down_revision = '3f1c2a7d9b10'
+branch_labels = None
+depends_on = None
+
+# Must match search.VENUE_DOCUMENT / search.ARTIST_DOCUMENT
+DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(state, '') || ' ' || coalesce(genres, ''))"
+TABLES = {
+    'Venue': 'venue',
+    'Artist': 'artist',
+}
+
+
+def _sqlite_tokenizer():
+    # Same as search._sqlite_tokenizer: trigram exists from SQLite 3.34
+    version = op.get_bind().execute(sa.text('SELECT sqlite_version()')).scalar()
+    major, minor = (int(part) for part in version.split('.')[:2])
+    return 'trigram' if (major, minor) >= (3, 34) else 'unicode61'
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, prefix in TABLES.items():
+            op.execute(f'CREATE INDEX ix_{prefix}_search_trgm ON "{table}" USING gin ({DOCUMENT} gin_trgm_ops)')
+            op.execute(f'CREATE INDEX ix_{prefix}_search_tsv ON "{table}" USING gin (to_tsvector(\'simple\', {DOCUMENT}))')
+    elif dialect == 'sqlite':
+        tokenizer = _sqlite_tokenizer()
+        for table, prefix in TABLES.items():
+            op.execute(f"CREATE VIRTUAL TABLE {prefix}_search USING fts5(name, city, state, genres, tokenize='{tokenizer}')")
+            op.execute(
+                f"INSERT INTO {prefix}_search (rowid, name, city, state, genres) "
+                f"SELECT id, coalesce(name, ''), coalesce(city, ''), coalesce(state, ''), "
+                f"replace(trim(coalesce(genres, ''), '{{}}'), ',', ' ') FROM \"{table}\""
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for prefix in TABLES.values():
+            op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_search_tsv')
+            op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_search_trgm')
+    elif dialect == 'sqlite':
+        for prefix in TABLES.values():
+            op.execute(f'DROP TABLE IF EXISTS {prefix}_search')
@@ -0,0 +1,130 @@
+"""normalize genres into Genre and association tables
+
+Revision ID: e1a9c3b58f42
+Revises: b7d2e9f4c613
+Create Date: 2026-10-18 15:26:51.308417
+
+"""
+import csv
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a9c3b58f42'
+down_revision = 'b7d2e9f4c613'
+branch_labels = None
+depends_on = None
+
+# (entity table, association table, association column, old column type)
+ENTITIES = (
+    ('Venue', 'venue_genres', 'venue_id', sa.String()),
+    ('Artist', 'artist_genres', 'artist_id', sa.String(length=120)),
+)
+
+# Search expressions before/after the genres column goes away, see search.py
+OLD_DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(state, '') || ' ' || coalesce(genres, ''))"
+NEW_DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(state, ''))"
+SEARCH_PREFIXES = {'Venue': 'venue', 'Artist': 'artist'}
+
+
+def parse_genres(value):
+    # '{Jazz,"Rock n Roll"}' (a text[] literal stored as a string) -> ['Jazz', 'Rock n Roll']
+    if not value:
+        return []
+    inner = value.strip().strip('{}')
+    if not inner:
+        return []
+    row = next(csv.reader([inner], quotechar='"', escapechar='\\', skipinitialspace=True))
+    return [name.strip() for name in row if name.strip()]
+
+
+def format_genres(names):
+    return '{' + ','.join('"%s"' % name if (' ' in name or ',' in name) else name for name in names) + '}'
+
+
+def _drop_search_indexes(dialect):
+    if dialect == 'postgresql':
+        for prefix in SEARCH_PREFIXES.values():
+            op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_search_tsv')
+            op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_search_trgm')
+
+
+def _create_search_indexes(dialect, document):
+    if dialect == 'postgresql':
+        for table, prefix in SEARCH_PREFIXES.items():
+            op.execute(f'CREATE INDEX ix_{prefix}_search_trgm ON "{table}" USING gin ({document} gin_trgm_ops)')
+            op.execute(f'CREATE INDEX ix_{prefix}_search_tsv ON "{table}" USING gin (to_tsvector(\'simple\', {document}))')
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for table, association, column, _ in ENTITIES:
+        op.create_table(association,
+        sa.Column(column, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([column], [f'{table}.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(column, 'genre_id')
+        )
+        op.create_index(f'ix_{association}_genre_id_{column}', association, ['genre_id', column], unique=False)
+
+    # Convert the brace-delimited strings
+    genre_table = sa.table('Genre', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    genre_ids = {}
+    for table, association, column, _ in ENTITIES:
+        rows = bind.execute(sa.text(f'SELECT id, genres FROM "{table}"')).fetchall()
+        links = []
+        for entity_id, value in rows:
+            for name in dict.fromkeys(parse_genres(value)):
+                if name not in genre_ids:
+                    bind.execute(genre_table.insert().values(name=name))
+                    genre_ids[name] = bind.execute(
+                        sa.select(genre_table.c.id).where(genre_table.c.name == name)
+                    ).scalar()
+                links.append({column: entity_id, 'genre_id': genre_ids[name]})
+        if links:
+            association_table = sa.table(association, sa.column(column, sa.Integer), sa.column('genre_id', sa.Integer))
+            op.bulk_insert(association_table, links)
+
+    # The old search indexes are built on the genres column
+    _drop_search_indexes(dialect)
+    for table, _, _, _ in ENTITIES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('genres')
+    _create_search_indexes(dialect, NEW_DOCUMENT)
+
+
+def downgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    _drop_search_indexes(dialect)
+    for table, association, column, column_type in ENTITIES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('genres', column_type, nullable=True))
+        rows = bind.execute(sa.text(
+            f'SELECT a.{column}, g.name FROM {association} a JOIN "Genre" g ON g.id = a.genre_id ORDER BY a.{column}, g.name'
+        )).fetchall()
+        names = {}
+        for entity_id, name in rows:
+            names.setdefault(entity_id, []).append(name)
+        for entity_id, entity_names in names.items():
+            bind.execute(
+                sa.text(f'UPDATE "{table}" SET genres = :genres WHERE id = :id'),
+                {'genres': format_genres(entity_names), 'id': entity_id}
+            )
+    _create_search_indexes(dialect, OLD_DOCUMENT)
+
+    for _, association, column, _ in reversed(ENTITIES):
+        op.drop_index(f'ix_{association}_genre_id_{column}', table_name=association)
+        op.drop_table(association)
+    op.drop_table('Genre')
@@ -1,13 +1,52 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from routing import RoutingSQLAlchemy
 
-db = SQLAlchemy()
+# Routes GET requests to the read replicas, see routing.py
+db = RoutingSQLAlchemy()
+
+# Genres are normalized: one Genre row per name and an association table per
+# entity. The (genre_id, <entity>_id) indexes serve the "by genre" pages.
+venue_genres = db.Table('venue_genres',
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+artist_genres = db.Table('artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable = False, unique = True)
+
+    @classmethod
+    def from_names(cls, names):
+        # Genre rows for the given names, creating the missing ones
+        names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+        if not names:
+            return []
+        existing = {genre.name: genre for genre in cls.query.filter(cls.name.in_(names)).all()}
+        genres = []
+        for name in names:
+            genre = existing.get(name)
+            if genre is None:
+                genre = cls(name=name)
+                db.session.add(genre)
+            genres.append(genre)
+        return genres
+
+    def __repr__(self):
+        return f'<Genre id={self.id} name={self.name}>'
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
-    genres = db.Column(db.String)
+    genres = db.relationship('Genre', secondary = venue_genres, lazy = True, order_by = 'Genre.name')
     address = db.Column(db.String(120))
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
@@ -17,7 +56,22 @@ class Venue(db.Model):
     facebook_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default = False)
     seeking_description = db.Column(db.String(120))
+    # IANA name (e.g. 'America/New_York') show times are displayed in; empty
+    # for the server's time zone
+    timezone = db.Column(db.String(64))
+    # Maintained by show_counts.py: shows are counted on insert and moved to
+    # past by the periodic rollover
+    upcoming_shows_count = db.Column(db.Integer, nullable = False, default = 0, server_default = '0')
+    past_shows_count = db.Column(db.Integer, nullable = False, default = 0, server_default = '0')
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.now, onupdate = datetime.now)
     artist = db.relationship('Show', backref='venue', lazy = True)
+    __table_args__ = (
+        # /venues area listing and the duplicate name check / name ordering
+        db.Index('ix_Venue_state_city_id', 'state', 'city', 'id'),
+        db.Index('ix_Venue_name_id', 'name', 'id'),
+        # `flask export --since`
+        db.Index('ix_Venue_updated_at', 'updated_at'),
+    )
 
     def __repr__(self):
         return f"<Venue id={self.id} name={self.name} city={self.city} state={self.city}>\n"	
@@ -27,19 +81,33 @@ class Artist(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
-    genres = db.relationship('Genre', backref = 'genres', lazy = True, collection_class = list)
+    genres = db.relationship('Genre', secondary = artist_genres, lazy = True, order_by = 'Genre.name')
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default = False)
     seeking_description = db.Column(db.String(120))
+    # See Venue.upcoming_shows_count
+    upcoming_shows_count = db.Column(db.Integer, nullable = False, default = 0, server_default = '0')
+    past_shows_count = db.Column(db.Integer, nullable = False, default = 0, server_default = '0')
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.now, onupdate = datetime.now)
     venue = db.relationship('Show', backref='artist', lazy = True)
+    __table_args__ = (
+        # Duplicate name check and the (name, id) keyset on /artists
+        db.Index('ix_Artist_name_id', 'name', 'id'),
+        # `flask export --since`
+        db.Index('ix_Artist_updated_at', 'updated_at'),
+    )
     
 
+def _starts_later(context):
+    # Show.upcoming default; a show without start_time starts now (past)
+    start_time = context.get_current_parameters().get('start_time')
+    return start_time is not None and start_time > datetime.now()
+
 # Add Show model
 class Show(db.Model):
     __tablename__ = 'Show'
@@ -47,5 +115,86 @@ class Show(db.Model):
     start_time = db.Column(db.DateTime, nullable = False, default = datetime.now)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable = False)
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable = False)
+    # Which of its venue's and artist's counters the show is counted in;
+    # cleared by the rollover once start_time has passed
+    upcoming = db.Column(db.Boolean, nullable = False, default = _starts_later, server_default = db.false())
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.now, onupdate = datetime.now)
+    __table_args__ = (
+        # Shows of one venue/artist split on start_time, and the (start_time, id) keyset on /shows
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+        # The rollover's "upcoming shows that have started"
+        db.Index('ix_Show_upcoming_start_time', 'upcoming', 'start_time'),
+        # `flask export --since`
+        db.Index('ix_Show_updated_at', 'updated_at'),
+    )
+    def __repr__(self):
+        return f'<Show id={self.id} artist_id={self.artist_id} venue_id={self.venue_id} start_time={self.start_time}>'
+
+
+# Past shows moved out of the live catalog by `flask shows archive`
+# (partitions.py), same columns as Show. On PostgreSQL both tables are
+# partitioned by month of start_time, with (id, start_time) primary keys
+# created by the migration; the model keeps id as the identity.
+class ShowArchive(db.Model):
+    __tablename__ = 'ShowArchive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_time = db.Column(db.DateTime, nullable = False)
+    artist_id = db.Column(db.Integer, nullable = False)
+    venue_id = db.Column(db.Integer, nullable = False)
+    upcoming = db.Column(db.Boolean, nullable = False, default = False, server_default = db.false())
+    updated_at = db.Column(db.DateTime, nullable = False)
+    __table_args__ = (
+        db.Index('ix_ShowArchive_start_time', 'start_time'),
+    )
+    def __repr__(self):
+        return f'<ShowArchive id={self.id} start_time={self.start_time}>'
+
+
+# Denormalized read model for the artist page, one document per artist.
+# next_rollover is the start time of the artist's earliest upcoming show,
+# i.e. the moment the document goes stale because a show becomes a past show.
+class ArtistProfile(db.Model):
+    __tablename__ = 'ArtistProfile'
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True)
+    document = db.Column(db.JSON, nullable = False)
+    next_rollover = db.Column(db.DateTime, index = True)
+    refreshed_at = db.Column(db.DateTime, nullable = False, default = datetime.now)
+    def __repr__(self):
+        return f'<ArtistProfile artist_id={self.artist_id} refreshed_at={self.refreshed_at}>'
+
+
+# Version counter per entity type ('venue', 'artist', 'show'), bumped by every
+# write. Cached pages are keyed by the versions they were built from.
+class EntityVersion(db.Model):
+    __tablename__ = 'EntityVersion'
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable = False, default = 0)
+    updated_at = db.Column(db.DateTime, nullable = False, default = datetime.now, onupdate = datetime.now)
+    def __repr__(self):
+        return f'<EntityVersion name={self.name} version={self.version}>'
+
+
+# Background job queue (jobs.py). A job is written in the transaction of the
+# request that enqueued it and picked up by a worker once committed.
+class Job(db.Model):
+    __tablename__ = 'Job'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), nullable = False)
+    payload = db.Column(db.JSON, nullable = False, default = dict)
+    # queued -> running -> deleted when done; failed after max_attempts
+    status = db.Column(db.String(16), nullable = False, default = 'queued')
+    attempts = db.Column(db.Integer, nullable = False, default = 0)
+    max_attempts = db.Column(db.Integer, nullable = False, default = 5)
+    run_at = db.Column(db.DateTime, nullable = False, default = datetime.now)
+    # A running job whose worker died is picked up again after this
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable = False, default = datetime.now)
+    __table_args__ = (
+        # The workers' "next due job" lookup
+        db.Index('ix_Job_status_run_at', 'status', 'run_at'),
+    )
     def __repr__(self):
-        return f'<Show id={self.id} artist_id={self.artist_id} venue_id={self.venue_id} start_time={self.start_time}>'
\ No newline at end of file
+        return f'<Job id={self.id} name={self.name} status={self.status} attempts={self.attempts}>'
@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, literal, or_, tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset (cursor) pagination
+# - A page is defined by the sort key of the row it starts after (or ends
+#   before), never by an offset, so page N costs the same as page 1
+# - keys is a list of (expression, descending) pairs; the last key must be
+#   unique (usually the primary key) so the order is total
+# - Cursors are opaque url-safe strings carrying the key values
+#----------------------------------------------------------------------------#
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'k': [_encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    # Returns (direction, values); direction is 'after' or 'before'
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload['d']
+        values = [_decode_value(value) for value in payload['k']]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+    if direction not in ('after', 'before'):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    # Clamp a user supplied page size
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _seek(keys, values, forward):
+    # Rows strictly after (forward) or before the given key values
+    values = [literal(value, expression.type) for (expression, _), value in zip(keys, values)]
+    descending = {desc for _, desc in keys}
+    if len(descending) == 1:
+        # Same direction for every key: a row value comparison, which the
+        # database can answer from a composite index
+        columns = tuple_(*[expression for expression, _ in keys])
+        if forward != descending.pop():
+            return columns > tuple_(*values)
+        return columns < tuple_(*values)
+    clauses = []
+    for index, (expression, desc) in enumerate(keys):
+        equal = [keys[i][0] == values[i] for i in range(index)]
+        beyond = expression > values[index] if forward != desc else expression < values[index]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def _order(keys, forward):
+    # Going backward every key is sorted the other way round
+    return [expression.desc() if desc == forward else expression.asc() for expression, desc in keys]
+
+
+def keyset_page(query, keys, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    # query: the unordered query to paginate
+    # keys: [(expression, descending), ...] defining the order
+    # Items are the rows of the query (the entity itself for one-entity queries),
+    # trailing _key_N columns hold the sort key values
+    direction, values = decode_cursor(cursor) if cursor else ('after', None)
+    if values is not None and len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    forward = direction == 'after'
+
+    width = len(query.column_descriptions)
+    if values is not None:
+        query = query.filter(_seek(keys, values, forward))
+    # The key values are selected alongside each row to build the cursors
+    rows = query.add_columns(*[expression.label(f'_key_{index}') for index, (expression, _) in enumerate(keys)]) \
+        .order_by(*_order(keys, forward)) \
+        .limit(limit + 1) \
+        .all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        # Coming from a cursor there is always a page on the side we came from
+        if (more if forward else values is not None):
+            next_cursor = encode_cursor('after', rows[-1][width:])
+        if (values is not None if forward else more):
+            prev_cursor = encode_cursor('before', rows[0][width:])
+    items = [row[0] if width == 1 else row for row in rows]
+    return Page(items, next_cursor, prev_cursor)
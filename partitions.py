@@ -0,0 +1,193 @@
+import logging
+from datetime import datetime
+from sqlalchemy import text
+from models import Show, ShowArchive, db
+from profiles import refresh_artist_profile
+from show_counts import discount_shows, rollover_show_counts
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Show partitions
+# - On PostgreSQL "Show" is range partitioned by month of start_time
+#   ("Show_2026_10" holds October 2026), see migration b19e6d0c4f72.
+#   Queries filtering on start_time (upcoming shows, the /shows keyset)
+#   only read the partitions they need.
+# - Partitions are created ahead (SHOW_PARTITION_MONTHS_AHEAD) by a daily
+#   job, and on demand before inserts of older/later shows. Rows that still
+#   find no month go to the "Show_default" partition, and move to their
+#   month's partition when it is created.
+# - archive_shows() moves whole months of past shows to "ShowArchive": on
+#   PostgreSQL the partitions are detached and attached to the archive
+#   table (no rows are copied); on SQLite, which has no partitioning, the
+#   rows are copied and deleted
+# - Archived shows leave the live catalog: the counters, artist profiles
+#   and venue pages only cover "Show"
+#----------------------------------------------------------------------------#
+
+# Month starts known to have a partition, per process
+_known = set()
+COLUMNS = 'id, start_time, artist_id, venue_id, upcoming, updated_at'
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _months(start, end):
+    # Month starts from start's month to end's month, inclusive
+    month = month_start(start)
+    while month <= end:
+        yield month
+        month = next_month(month)
+
+
+def partition_name(table, month):
+    return f'{table}_{month:%Y_%m}'
+
+
+def _partitions(table):
+    # [(partition name, bound expression)] of the partitions attached to table
+    return db.session.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {'table': table}).all()
+
+
+def _partition_bounds(table):
+    # {partition name: month start}, without the DEFAULT partition
+    # FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00')
+    return {name: datetime.fromisoformat(bound.split("'")[1]) for name, bound in _partitions(table) if "'" in bound}
+
+
+def _default_partition(table):
+    return next((name for name, bound in _partitions(table) if bound == 'DEFAULT'), None)
+
+
+def _create_partition(month, default):
+    name = partition_name('Show', month)
+    bounds = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+    if default is None:
+        db.session.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "Show" {bounds}'))
+        return name
+    # A new partition can't overlap rows of the DEFAULT partition: move them
+    # to a standalone table first, then attach it (indexes and foreign keys
+    # are created on attach)
+    db.session.execute(text(f'CREATE TABLE "{name}" (LIKE "Show" INCLUDING DEFAULTS)'))
+    db.session.execute(text(
+        f'WITH moved AS (DELETE FROM "{default}" '
+        f"WHERE start_time >= '{month:%Y-%m-%d}' AND start_time < '{next_month(month):%Y-%m-%d}' "
+        f'RETURNING {COLUMNS}) '
+        f'INSERT INTO "{name}" ({COLUMNS}) SELECT {COLUMNS} FROM moved'
+    ))
+    db.session.execute(text(f'ALTER TABLE "Show" ATTACH PARTITION "{name}" {bounds}'))
+    return name
+
+
+def list_partitions(table='Show'):
+    # [(name, month start)] in month order; empty outside PostgreSQL
+    if _dialect() != 'postgresql':
+        return []
+    return sorted(_partition_bounds(table).items(), key=lambda item: item[1])
+
+
+def ensure_show_partitions(start=None, end=None, months_ahead=12):
+    # Creates the missing monthly partitions from start (default: this month)
+    # to end (default: months_ahead months from now). Returns the names
+    # created; the caller commits.
+    if _dialect() != 'postgresql':
+        return []
+    now = datetime.now()
+    start = start or now
+    if end is None:
+        end = month_start(now)
+        for _ in range(months_ahead):
+            end = next_month(end)
+    months = list(_months(start, end))
+    if _known.issuperset(months):
+        return []
+    _known.update(_partition_bounds('Show').values())
+    default = _default_partition('Show')
+    created = []
+    for month in months:
+        if month in _known:
+            continue
+        created.append(_create_partition(month, default))
+        _known.add(month)
+    if created:
+        log.info('Created show partitions %s', ', '.join(created))
+    return created
+
+
+def ensure_partitions_for(start_times):
+    # Before an insert: the partitions the rows will go to
+    start_times = [value for value in start_times if value is not None]
+    if start_times and _dialect() == 'postgresql':
+        ensure_show_partitions(min(start_times), max(start_times))
+
+
+#  Archive
+#  ----------------------------------------------------------------
+
+def _archive_postgresql(before):
+    default = _default_partition('Show')
+    if default is not None:
+        # Shows of those months still in the DEFAULT partition get theirs first
+        months = db.session.execute(text(
+            f'SELECT DISTINCT date_trunc(\'month\', start_time) FROM "{default}" WHERE start_time < :before'
+        ), {'before': before}).scalars().all()
+        for month in months:
+            _create_partition(month, default)
+            _known.add(month)
+    moved = 0
+    for name, month in list_partitions('Show'):
+        if next_month(month) > before:
+            break
+        archived = partition_name('ShowArchive', month)
+        moved += db.session.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+        db.session.execute(text(f'ALTER TABLE "Show" DETACH PARTITION "{name}"'))
+        db.session.execute(text(f'ALTER TABLE "{name}" RENAME TO "{archived}"'))
+        db.session.execute(text(
+            f'ALTER TABLE "ShowArchive" ATTACH PARTITION "{archived}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"
+        ))
+        _known.discard(month)
+    return moved
+
+
+def _archive_sqlite(before):
+    columns = [column.name for column in Show.__table__.columns]
+    rows = db.session.query(*Show.__table__.columns).filter(Show.start_time < before)
+    db.session.execute(ShowArchive.__table__.insert().from_select(columns, rows))
+    return Show.query.filter(Show.start_time < before).delete(synchronize_session=False)
+
+
+def archive_shows(before):
+    # Moves the shows of the months before `before` (rounded down to a month
+    # start, and never past this month) to ShowArchive. Returns how many
+    # shows moved; the caller commits.
+    before = min(month_start(before), month_start(datetime.now()))
+    # The counters go by Show.upcoming; bring it up to date first
+    rollover_show_counts()
+    archived = Show.start_time < before
+    artist_ids = [id for (id,) in db.session.query(Show.artist_id).filter(archived).distinct()]
+    if not artist_ids:
+        return 0
+    discount_shows(archived)
+    if _dialect() == 'postgresql':
+        moved = _archive_postgresql(before)
+    else:
+        moved = _archive_sqlite(before)
+    for artist_id in artist_ids:
+        refresh_artist_profile(artist_id)
+    return moved
@@ -0,0 +1,128 @@
+from datetime import datetime
+from models import Venue, Artist, Show, ArtistProfile, db
+from queries import genre_names
+
+#----------------------------------------------------------------------------#
+# Artist profile read model
+# - The artist page is served from one precomputed document per artist
+# - Write handlers call refresh_artist_profile() before committing, so the
+#   document changes in the same transaction as the data it is built from
+# - rollover_artist_profiles() rebuilds documents whose upcoming shows have
+#   started since they were built (a periodic job, see JOBS_SCHEDULE)
+#----------------------------------------------------------------------------#
+
+def build_artist_profile(artist, now=None):
+    # Returns (document, next_rollover) for the given artist
+    now = now or datetime.now()
+    rows = db.session.query(
+            Show.start_time,
+            Venue.id.label('venue_id'),
+            Venue.name.label('venue_name'),
+            Venue.image_link.label('venue_image_link'),
+            Venue.timezone.label('venue_timezone'),
+            (Show.start_time > now).label('is_upcoming')
+        ).join(Venue, Show.venue_id == Venue.id) \
+        .filter(Show.artist_id == artist.id) \
+        .order_by(Show.start_time, Show.id) \
+        .all()
+
+    upcoming_shows = []
+    past_shows = []
+    next_rollover = None
+    for row in rows:
+        show_data = {
+            "venue_id": row.venue_id,
+            "venue_name": row.venue_name,
+            "venue_image_link": row.venue_image_link,
+            "venue_timezone": row.venue_timezone,
+            "start_time": row.start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        }
+        if row.is_upcoming:
+            if next_rollover is None:
+                next_rollover = row.start_time
+            upcoming_shows.append(show_data)
+        else:
+            past_shows.append(show_data)
+
+    document = {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": genre_names(artist.genres),
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+    if artist.seeking_venue:
+        document["seeking_description"] = artist.seeking_description
+    return document, next_rollover
+
+
+def refresh_artist_profile(artist_id, now=None):
+    # Rebuild and stage the profile document; the caller commits
+    now = now or datetime.now()
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        return None
+    document, next_rollover = build_artist_profile(artist, now)
+    profile = ArtistProfile.query.get(artist_id)
+    if profile is None:
+        profile = ArtistProfile(artist_id=artist_id)
+        db.session.add(profile)
+    profile.document = document
+    profile.next_rollover = next_rollover
+    profile.refreshed_at = now
+    return profile
+
+
+def refresh_venue_artist_profiles(venue_id, now=None):
+    # Venue name and image are copied into the profiles of artists playing there
+    artist_ids = db.session.query(Show.artist_id) \
+        .filter(Show.venue_id == venue_id) \
+        .distinct() \
+        .all()
+    for (artist_id,) in artist_ids:
+        refresh_artist_profile(artist_id, now)
+
+
+def get_artist_profile(artist_id):
+    # One primary key lookup; falls back to building the document when the
+    # artist has no stored profile yet (e.g. rows created before the read model)
+    profile = ArtistProfile.query.get(artist_id)
+    if profile is not None:
+        return profile.document
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        return None
+    document, _ = build_artist_profile(artist)
+    return document
+
+
+def rollover_artist_profiles(now=None):
+    # Rebuild the documents in which an upcoming show has started. Returns
+    # how many were rebuilt; the caller commits.
+    now = now or datetime.now()
+    artist_ids = db.session.query(ArtistProfile.artist_id) \
+        .filter(ArtistProfile.next_rollover <= now) \
+        .all()
+    for (artist_id,) in artist_ids:
+        refresh_artist_profile(artist_id, now)
+    return len(artist_ids)
+
+
+def rebuild_artist_profiles(now=None):
+    # Build the documents for every artist, used to backfill the read model
+    now = now or datetime.now()
+    count = 0
+    for (artist_id,) in db.session.query(Artist.id).order_by(Artist.id).all():
+        refresh_artist_profile(artist_id, now)
+        count += 1
+    db.session.commit()
+    return count
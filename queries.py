@@ -0,0 +1,173 @@
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from sqlalchemy.orm import selectinload
+from models import Venue, Artist, Show, Genre, venue_genres, artist_genres, db
+from pagination import DEFAULT_PAGE_SIZE, keyset_page
+
+#----------------------------------------------------------------------------#
+# Read queries used by the views.
+#----------------------------------------------------------------------------#
+
+def genre_names(genres):
+    return [genre.name for genre in genres]
+
+
+def genre_names_by_id(association, column, ids):
+    # {id: [genre names]} for a batch of venues or artists, one query
+    rows = db.session.query(column, Genre.name) \
+        .join(Genre, Genre.id == association.c.genre_id) \
+        .filter(column.in_(ids)) \
+        .order_by(column, Genre.name) \
+        .all()
+    return {id: [name for _, name in group] for id, group in groupby(rows, key=itemgetter(0))}
+
+
+def venue_areas():
+    # One query whatever the catalog size: every venue with its stored
+    # upcoming show count, ordered so that venues of the same (city, state)
+    # area are adjacent (served by the (state, city, id) index)
+    rows = db.session.query(Venue.city, Venue.state, Venue.id, Venue.name, Venue.updated_at,
+                            Venue.upcoming_shows_count) \
+        .order_by(Venue.state, Venue.city, Venue.id) \
+        .all()
+
+    areas = []
+    for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "version": venue.updated_at,
+                "num_upcoming_shows": venue.upcoming_shows_count
+            } for venue in venues]
+        })
+    return areas
+
+
+def venue_detail(venue_id, now=None):
+    # The venue by primary key (its genres by an indexed IN lookup), then its
+    # shows joined with their artists in one query. Past/upcoming is decided
+    # by the database against a single "now".
+    # Returns None when the venue does not exist.
+    now = now or datetime.now()
+    venue = Venue.query.options(selectinload(Venue.genres)).get(venue_id)
+    if venue is None:
+        return None
+
+    rows = db.session.query(
+            Show.start_time,
+            Artist.id.label('artist_id'),
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            (Show.start_time > now).label('is_upcoming')
+        ).join(Artist, Show.artist_id == Artist.id) \
+        .filter(Show.venue_id == venue_id) \
+        .order_by(Show.start_time, Show.id) \
+        .all()
+
+    upcoming_shows = []
+    past_shows = []
+    for row in rows:
+        show_data = {
+            "artist_id": row.artist_id,
+            "artist_name": row.artist_name,
+            "artist_image_link": row.artist_image_link,
+            "start_time": row.start_time
+        }
+        if row.is_upcoming:
+            upcoming_shows.append(show_data)
+        else:
+            past_shows.append(show_data)
+
+    data = {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": genre_names(venue.genres),
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "image_link": venue.image_link,
+        "timezone": venue.timezone,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+    if venue.seeking_talent:
+        data["seeking_description"] = venue.seeking_description
+    return data
+
+
+def shows_page(cursor=None, limit=DEFAULT_PAGE_SIZE):
+    # Shows with their venue and artist in one joined query, keyset
+    # paginated on (start_time, id)
+    query = db.session.query(
+            Show.id,
+            Show.start_time,
+            Venue.id.label('venue_id'),
+            Venue.name.label('venue_name'),
+            Venue.timezone.label('venue_timezone'),
+            Artist.id.label('artist_id'),
+            Artist.name.label('artist_name'),
+            Artist.image_link.label('artist_image_link'),
+            Show.updated_at,
+            Venue.updated_at.label('venue_updated_at'),
+            Artist.updated_at.label('artist_updated_at')
+        ).join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id)
+    page = keyset_page(query, [(Show.start_time, False), (Show.id, False)], cursor, limit)
+    page.items = [{
+        "id": row.id,
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "venue_timezone": row.venue_timezone,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time,
+        # The card shows the show, its venue and its artist
+        "version": max(row.updated_at, row.venue_updated_at, row.artist_updated_at)
+    } for row in page.items]
+    return page
+
+
+def artists_page(cursor=None, limit=DEFAULT_PAGE_SIZE):
+    # Artist ids and names keyset paginated on (name, id)
+    query = db.session.query(Artist.id, Artist.name, Artist.updated_at)
+    page = keyset_page(query, [(Artist.name, False), (Artist.id, False)], cursor, limit)
+    page.items = [{
+        "id": row.id,
+        "name": row.name,
+        "version": row.updated_at
+    } for row in page.items]
+    return page
+
+
+def _by_genre(model, association, column, genre, cursor, limit):
+    # Entities tagged with a genre: Genre.name is unique and the association
+    # table is indexed on (genre_id, <entity>_id), so no table is scanned
+    query = db.session.query(model.id, model.name) \
+        .join(association, column == model.id) \
+        .join(Genre, Genre.id == association.c.genre_id) \
+        .filter(Genre.name == genre)
+    page = keyset_page(query, [(model.name, False), (model.id, False)], cursor, limit)
+    page.items = [{
+        "id": row.id,
+        "name": row.name
+    } for row in page.items]
+    return page
+
+
+def venues_by_genre(genre, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    return _by_genre(Venue, venue_genres, venue_genres.c.venue_id, genre, cursor, limit)
+
+
+def artists_by_genre(genre, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    return _by_genre(Artist, artist_genres, artist_genres.c.artist_id, genre, cursor, limit)
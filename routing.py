@@ -0,0 +1,89 @@
+import random
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import event, orm
+
+#----------------------------------------------------------------------------#
+# Connection pools and read/write routing
+# - Pool size, overflow, pre-ping, recycle, pool timeout and the PostgreSQL
+#   statement timeout come from the DATABASE_* settings in config.py and
+#   apply to the primary and every replica
+# - GET/HEAD requests read from one of the replica binds (picked once per
+#   request); every other request, anything flushed, and everything
+#   outside a request (CLI, jobs) uses the primary
+# - Read your writes: a request that wrote pins its visitor to the primary
+#   for DATABASE_STICKY_SECONDS, through the session cookie
+#----------------------------------------------------------------------------#
+
+REPLICA_PREFIX = 'replica'
+STICKY_KEY = '_primary_until'
+
+
+def replica_binds(app):
+    return [key for key in (app.config.get('SQLALCHEMY_BINDS') or {}) if key.startswith(REPLICA_PREFIX)]
+
+
+class RoutingSession(SignallingSession):
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        key = self._replica_key()
+        if key is not None:
+            return get_state(self.app).db.get_engine(self.app, bind=key)
+        return super().get_bind(mapper, clause)
+
+    def _replica_key(self):
+        if not has_request_context() or self._flushing or self.new or self.dirty or self.deleted:
+            return None
+        return g.get('db_replica')
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session_, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super().apply_driver_hacks(app, sa_url, options)
+        config = app.config
+        options['pool_pre_ping'] = config.get('DATABASE_POOL_PRE_PING', True)
+        if config.get('DATABASE_POOL_RECYCLE'):
+            options['pool_recycle'] = config['DATABASE_POOL_RECYCLE']
+        if sa_url.drivername.startswith('sqlite'):
+            # SQLite gets a NullPool/StaticPool above; there is no statement timeout
+            return sa_url, options
+        for option, key in (('pool_size', 'DATABASE_POOL_SIZE'),
+                            ('max_overflow', 'DATABASE_MAX_OVERFLOW'),
+                            ('pool_timeout', 'DATABASE_POOL_TIMEOUT')):
+            if config.get(key) is not None:
+                options[option] = config[key]
+        if sa_url.drivername.startswith('postgresql') and config.get('DATABASE_STATEMENT_TIMEOUT'):
+            connect_args = options.setdefault('connect_args', {})
+            connect_args['options'] = f"-c statement_timeout={config['DATABASE_STATEMENT_TIMEOUT']}"
+        return sa_url, options
+
+
+def _choose_bind():
+    if request.method not in ('GET', 'HEAD') or session.get(STICKY_KEY, 0) > time.time():
+        return
+    replicas = replica_binds(current_app)
+    if replicas:
+        g.db_replica = random.choice(replicas)
+
+
+def _stick_to_primary(response):
+    sticky = current_app.config.get('DATABASE_STICKY_SECONDS', 5)
+    if g.get('db_wrote') and sticky:
+        session[STICKY_KEY] = time.time() + sticky
+    return response
+
+
+def init_routing(app):
+    if not replica_binds(app):
+        return
+    app.before_request(_choose_bind)
+    app.after_request(_stick_to_primary)
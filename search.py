@@ -0,0 +1,206 @@
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+from sqlalchemy.orm import selectinload
+from models import Venue, Artist, Genre, venue_genres, artist_genres, db
+
+#----------------------------------------------------------------------------#
+# Search
+# - Venues and artists are matched on name, city, state and genres
+# - PostgreSQL: expression indexes over the searchable text, a pg_trgm GIN
+#   index for substring matches and a tsvector GIN index for word matches,
+#   ranked by ts_rank + similarity. The indexes maintain themselves. Genres
+#   are matched through the genre association tables.
+# - SQLite: one FTS5 table per entity (trigram tokenizer when available),
+#   ranked by bm25. The FTS rows are written by index_venue()/index_artist()
+#   from the write handlers and can be rebuilt with `flask search reindex`.
+#----------------------------------------------------------------------------#
+
+# Must stay identical to the indexed expressions in the search migration,
+# otherwise PostgreSQL won't use the indexes. Only used on single-table queries.
+VENUE_DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(state, ''))"
+ARTIST_DOCUMENT = VENUE_DOCUMENT
+
+FTS_TABLES = {
+    'venue': 'venue_search',
+    'artist': 'artist_search',
+}
+
+# The trigram tokenizer needs at least 3 characters to use the index
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _genres_text(genres):
+    return ' '.join(genre.name for genre in genres)
+
+
+#  PostgreSQL
+#  ----------------------------------------------------------------
+
+def _postgres_search(model, document, association, column, term):
+    document = literal_column(document)
+    config = literal_column("'simple'")
+    tsvector = func.to_tsvector(config, document)
+    tsquery = func.plainto_tsquery(config, term)
+    pattern = f'%{escape_like(term)}%'
+    rank = func.ts_rank(tsvector, tsquery, type_=Float) + func.similarity(document, term, type_=Float)
+    # Genres live in their own (small) table, matched through the
+    # (genre_id, <entity>_id) association index
+    genre_match = db.session.query(column) \
+        .join(Genre, Genre.id == association.c.genre_id) \
+        .filter(Genre.name.ilike(pattern, escape='\\'))
+    query = model.query.filter(or_(
+        tsvector.op('@@')(tsquery),
+        document.ilike(pattern, escape='\\'),
+        model.id.in_(genre_match.subquery())
+    ))
+    # Higher rank is a better match
+    return query, [(rank, True), (model.name, False), (model.id, False)]
+
+
+#  SQLite
+#  ----------------------------------------------------------------
+
+_fts_tokenizer = {}
+
+def _sqlite_tokenizer():
+    # Cached per engine url; trigram exists from SQLite 3.34
+    key = str(db.engine.url)
+    if key not in _fts_tokenizer:
+        version = db.session.execute(text('SELECT sqlite_version()')).scalar()
+        major, minor = (int(part) for part in version.split('.')[:2])
+        _fts_tokenizer[key] = 'trigram' if (major, minor) >= (3, 34) else 'unicode61'
+    return _fts_tokenizer[key]
+
+
+def ensure_search_tables():
+    # Create the FTS5 tables if they are missing (SQLite only)
+    if _dialect() != 'sqlite':
+        return
+    tokenizer = _sqlite_tokenizer()
+    for table in FTS_TABLES.values():
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+            f"USING fts5(name, city, state, genres, tokenize='{tokenizer}')"
+        ))
+
+
+def _fts_match(term):
+    if _sqlite_tokenizer() == 'trigram':
+        # A quoted phrase is a substring match with the trigram tokenizer
+        return '"' + term.replace('"', '""') + '"'
+    # Prefix match on every word
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in term.split())
+
+
+def _sqlite_search(model, table, term):
+    if _sqlite_tokenizer() == 'trigram' and len(term) < TRIGRAM_MIN_LENGTH:
+        # Too short for the trigram index, scan the (small) FTS table instead
+        where = ("name LIKE :pattern ESCAPE '\\' OR city LIKE :pattern ESCAPE '\\' "
+                 "OR state LIKE :pattern ESCAPE '\\' OR genres LIKE :pattern ESCAPE '\\'")
+        matches = text(f"SELECT rowid AS id, 0.0 AS rank FROM {table} WHERE {where}") \
+            .bindparams(pattern=f'%{escape_like(term)}%')
+    else:
+        matches = text(f"SELECT rowid AS id, bm25({table}) AS rank FROM {table} WHERE {table} MATCH :match") \
+            .bindparams(match=_fts_match(term))
+    matches = matches.columns(id=Integer, rank=Float).subquery()
+    query = model.query.join(matches, model.id == matches.c.id)
+    # bm25() is lower for better matches
+    return query, [(matches.c.rank, False), (model.name, False), (model.id, False)]
+
+
+def _sqlite_index(table, entity):
+    db.session.execute(text(f"DELETE FROM {table} WHERE rowid = :id"), {'id': entity.id})
+    db.session.execute(
+        text(f"INSERT INTO {table} (rowid, name, city, state, genres) VALUES (:id, :name, :city, :state, :genres)"),
+        {
+            'id': entity.id,
+            'name': entity.name or '',
+            'city': entity.city or '',
+            'state': entity.state or '',
+            'genres': _genres_text(entity.genres)
+        }
+    )
+
+
+#  Public API
+#  ----------------------------------------------------------------
+
+def _search(model, document, association, column, table, term):
+    term = (term or '').strip()
+    if not term:
+        return model.query, [(model.name, False), (model.id, False)]
+    if _dialect() == 'postgresql':
+        return _postgres_search(model, document, association, column, term)
+    if _dialect() == 'sqlite':
+        return _sqlite_search(model, FTS_TABLES[table], term)
+    query = model.query.filter(model.name.ilike(f'%{escape_like(term)}%', escape='\\'))
+    return query, [(model.name, False), (model.id, False)]
+
+
+def venue_search(term):
+    # (query, keys): the unordered query of matching venues and the sort keys
+    # putting the best match first, as expected by pagination.keyset_page()
+    return _search(Venue, VENUE_DOCUMENT, venue_genres, venue_genres.c.venue_id, 'venue', term)
+
+
+def artist_search(term):
+    # (query, keys) for matching artists, see venue_search()
+    return _search(Artist, ARTIST_DOCUMENT, artist_genres, artist_genres.c.artist_id, 'artist', term)
+
+
+def index_venue(venue):
+    # Stage the search row for a venue; the caller commits
+    if _dialect() == 'sqlite':
+        _sqlite_index(FTS_TABLES['venue'], venue)
+
+
+def index_artist(artist):
+    # Stage the search row for an artist; the caller commits
+    if _dialect() == 'sqlite':
+        _sqlite_index(FTS_TABLES['artist'], artist)
+
+
+def unindex_venue(venue_id):
+    if _dialect() == 'sqlite':
+        db.session.execute(text(f"DELETE FROM {FTS_TABLES['venue']} WHERE rowid = :id"), {'id': venue_id})
+
+
+def index_rows(key, rows):
+    # Bulk variant of index_venue()/index_artist() for freshly inserted rows,
+    # one executemany; rows are dicts with id, name, city, state and genres
+    # (a list of names). The caller commits.
+    if _dialect() != 'sqlite' or not rows:
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLES[key]} WHERE rowid = :id"), [{'id': row['id']} for row in rows])
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLES[key]} (rowid, name, city, state, genres) VALUES (:id, :name, :city, :state, :genres)"),
+        [{
+            'id': row['id'],
+            'name': row['name'] or '',
+            'city': row['city'] or '',
+            'state': row['state'] or '',
+            'genres': ' '.join(row['genres'])
+        } for row in rows]
+    )
+
+
+def reindex_all():
+    # Rebuild the SQLite FTS tables from the base tables
+    if _dialect() != 'sqlite':
+        return 0
+    ensure_search_tables()
+    count = 0
+    for key, model in (('venue', Venue), ('artist', Artist)):
+        db.session.execute(text(f"DELETE FROM {FTS_TABLES[key]}"))
+        for entity in model.query.options(selectinload(model.genres)).yield_per(1000):
+            _sqlite_index(FTS_TABLES[key], entity)
+            count += 1
+    db.session.commit()
+    return count
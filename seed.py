@@ -0,0 +1,156 @@
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from forms import VenueForm
+from models import Venue, Artist, Show, ShowArchive, Genre, ArtistProfile, venue_genres, artist_genres, db
+from importer import allocate_ids, bulk_insert, insert_shows
+from search import ensure_search_tables, index_rows, reindex_all
+from profiles import rebuild_artist_profiles
+from cache import bump_versions
+
+#----------------------------------------------------------------------------#
+# Synthetic data (`flask seed`)
+# - Fills Venue/Artist/Show at a given scale; the same seed and anchor
+#   always produce the same rows, so benchmark runs are comparable
+# - Venue and artist popularity is skewed (a few get most of the shows)
+#   and show times span two years back to one year ahead of the anchor
+# - Written with the bulk loader (COPY on PostgreSQL, executemany on SQLite)
+#----------------------------------------------------------------------------#
+
+SCALES = {
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000,
+}
+BATCH_SIZE = 10000
+
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+CITIES = [('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'), ('Chicago', 'IL'),
+          ('Austin', 'TX'), ('Seattle', 'WA'), ('Nashville', 'TN'), ('Denver', 'CO'), ('Boston', 'MA'),
+          ('Portland', 'OR'), ('Atlanta', 'GA'), ('Detroit', 'MI'), ('Miami', 'FL'), ('Phoenix', 'AZ'),
+          ('Memphis', 'TN'), ('New Orleans', 'LA')]
+WORDS = ['Blue', 'Velvet', 'Electric', 'Golden', 'Midnight', 'Silver', 'Crimson', 'Wild', 'Lucky', 'Hollow',
+         'Neon', 'Iron', 'Quiet', 'Rolling', 'Paper', 'Stone', 'Echo', 'Honey', 'Atomic', 'Northern']
+VENUE_NOUNS = ['Hall', 'Room', 'Lounge', 'Club', 'Theatre', 'Tavern', 'Garden', 'Cellar', 'Ballroom', 'Stage']
+ARTIST_NOUNS = ['Band', 'Quartet', 'Collective', 'Trio', 'Orchestra', 'Project', 'Brothers', 'Sisters', 'Kids', 'Ensemble']
+
+
+def scale_counts(shows):
+    # (venues, artists, shows) for a number of shows
+    return max(10, shows // 100), max(10, shows // 20), shows
+
+
+def _name(rng, nouns, index):
+    # Unique thanks to the index suffix
+    return f'{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(nouns)} {index}'
+
+
+def _weights(rng, count):
+    # Cumulative pareto weights: a long tail of rarely booked entities
+    return list(accumulate(rng.paretovariate(1.2) for _ in range(count)))
+
+
+def _genre_ids():
+    genres = Genre.from_names(GENRES)
+    db.session.flush()
+    return [genre.id for genre in genres]
+
+
+def _entities(rng, model, association, link, count, nouns, to_row, genre_ids, key):
+    ids = allocate_ids(model, count)
+    for start in range(0, count, BATCH_SIZE):
+        rows, links, search_rows = [], [], []
+        for id in ids[start:start + BATCH_SIZE]:
+            city, state = rng.choice(CITIES)
+            row = to_row(rng, id, _name(rng, nouns, id), city, state)
+            genres = rng.sample(genre_ids, rng.randint(1, 3))
+            rows.append(row)
+            links.extend({link.name: id, 'genre_id': genre_id} for genre_id in genres)
+            search_rows.append(dict(row, genres=[GENRES[genre_ids.index(genre_id)] for genre_id in genres]))
+        bulk_insert(model.__table__, rows)
+        bulk_insert(association, links)
+        index_rows(key, search_rows)
+        db.session.commit()
+    return ids
+
+
+def _venue_row(rng, id, name, city, state):
+    seeking = rng.random() < 0.3
+    return {
+        'id': id,
+        'name': name,
+        'city': city,
+        'state': state,
+        'address': f'{rng.randint(1, 9999)} {rng.choice(WORDS)} St',
+        'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+        'image_link': f'https://picsum.photos/seed/venue{id}/400/300',
+        'facebook_link': f'https://www.facebook.com/venue{id}',
+        'website': f'https://venue{id}.example.com',
+        'seeking_talent': seeking,
+        'seeking_description': 'Looking for local acts' if seeking else None,
+        'updated_at': datetime.now()
+    }
+
+
+def _artist_row(rng, id, name, city, state):
+    seeking = rng.random() < 0.4
+    return {
+        'id': id,
+        'name': name,
+        'city': city,
+        'state': state,
+        'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+        'image_link': f'https://picsum.photos/seed/artist{id}/400/300',
+        'facebook_link': f'https://www.facebook.com/artist{id}',
+        'website': f'https://artist{id}.example.com',
+        'seeking_venue': seeking,
+        'seeking_description': 'Looking for gigs' if seeking else None,
+        'updated_at': datetime.now()
+    }
+
+
+def _shows(rng, count, venue_ids, artist_ids, anchor):
+    venue_weights = _weights(rng, len(venue_ids))
+    artist_weights = _weights(rng, len(artist_ids))
+    first = anchor - timedelta(days=730)
+    span = 1095 * 24 * 4  # quarter hours in three years
+    for start in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - start)
+        venues = rng.choices(venue_ids, cum_weights=venue_weights, k=size)
+        artists = rng.choices(artist_ids, cum_weights=artist_weights, k=size)
+        now = datetime.now()
+        insert_shows([{
+            'venue_id': venue_id,
+            'artist_id': artist_id,
+            'start_time': first + timedelta(minutes=15 * rng.randrange(span)),
+            'updated_at': now
+        } for venue_id, artist_id in zip(venues, artists)])
+        db.session.commit()
+
+
+def clear_catalog():
+    # Every venue, artist and show (and what is derived from them)
+    for table in (ArtistProfile.__table__, ShowArchive.__table__, Show.__table__, venue_genres, artist_genres,
+                  Venue.__table__, Artist.__table__):
+        db.session.execute(table.delete())
+    db.session.commit()
+    reindex_all()
+
+
+def seed(shows, seed=0, anchor=None, profiles=True):
+    # Returns (venues, artists, shows) written. The tables should be empty.
+    anchor = anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    rng = random.Random(seed)
+    venue_count, artist_count, show_count = scale_counts(shows)
+    ensure_search_tables()
+    genre_ids = _genre_ids()
+    venue_ids = _entities(rng, Venue, venue_genres, venue_genres.c.venue_id, venue_count, VENUE_NOUNS,
+                          _venue_row, genre_ids, 'venue')
+    artist_ids = _entities(rng, Artist, artist_genres, artist_genres.c.artist_id, artist_count, ARTIST_NOUNS,
+                           _artist_row, genre_ids, 'artist')
+    _shows(rng, show_count, venue_ids, artist_ids, anchor)
+    if profiles:
+        rebuild_artist_profiles()
+    bump_versions('venue', 'artist', 'show')
+    db.session.commit()
+    return venue_count, artist_count, show_count
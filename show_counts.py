@@ -0,0 +1,135 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from flask import g, has_app_context
+from sqlalchemy import bindparam, case, func
+from models import Venue, Artist, Show, db
+
+#----------------------------------------------------------------------------#
+# Show counters
+# - Venue and Artist carry upcoming_shows_count/past_shows_count, so the
+#   listing and search pages read them with the rows, no aggregation
+# - Show.upcoming records which counter a show is counted in. Whatever
+#   inserts shows calls count_shows() in the same transaction.
+# - rollover_show_counts() moves the shows that have started from upcoming
+#   to past; it runs as a periodic job (JOBS_SCHEDULE), so the upcoming
+#   counts of the listings lag by up to that interval
+# - reconcile_show_counts() recomputes everything from the Show table
+#   (`flask counts reconcile`)
+#----------------------------------------------------------------------------#
+
+ShowCounts = namedtuple('ShowCounts', ['upcoming', 'past'])
+
+NO_SHOWS = ShowCounts(0, 0)
+ROLLOVER_BATCH = 1000
+
+
+def request_now():
+    # A single "now" per request so every upcoming/past split on a page agrees
+    if not has_app_context():
+        return datetime.now()
+    if 'show_counts_now' not in g:
+        g.show_counts_now = datetime.now()
+    return g.show_counts_now
+
+
+def _apply(model, deltas):
+    # deltas: {id: [upcoming delta, past delta]}; one executemany UPDATE.
+    # Keeps updated_at: a counter change isn't an edit (`flask export --since`)
+    deltas = {id: delta for id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    table = model.__table__
+    statement = table.update() \
+        .where(table.c.id == bindparam('b_id')) \
+        .values(upcoming_shows_count=table.c.upcoming_shows_count + bindparam('b_upcoming'),
+                past_shows_count=table.c.past_shows_count + bindparam('b_past'),
+                updated_at=table.c.updated_at)
+    db.session.execute(statement, [{'b_id': id, 'b_upcoming': upcoming, 'b_past': past}
+                                   for id, (upcoming, past) in deltas.items()])
+
+
+def count_shows(shows, sign=1):
+    # shows: (venue_id, artist_id, upcoming) of the rows inserted in this
+    # transaction, or deleted with sign=-1. The caller commits.
+    venues = defaultdict(lambda: [0, 0])
+    artists = defaultdict(lambda: [0, 0])
+    for venue_id, artist_id, upcoming in shows:
+        slot = 0 if upcoming else 1
+        venues[venue_id][slot] += sign
+        artists[artist_id][slot] += sign
+    _apply(Venue, venues)
+    _apply(Artist, artists)
+
+
+def discount_shows(criterion):
+    # Takes the shows matching criterion (a filter on Show) out of the
+    # counters, before they are deleted or archived. The caller commits.
+    for model, column in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        deltas = defaultdict(lambda: [0, 0])
+        rows = db.session.query(column, Show.upcoming, func.count()) \
+            .filter(criterion) \
+            .group_by(column, Show.upcoming)
+        for id, upcoming, count in rows:
+            deltas[id][0 if upcoming else 1] -= count
+        _apply(model, deltas)
+
+
+def rollover_show_counts(now=None):
+    # Shows counted as upcoming whose start_time has passed move to past.
+    # Returns how many moved; the caller commits.
+    now = now or datetime.now()
+    rows = db.session.query(Show.id, Show.venue_id, Show.artist_id) \
+        .filter(Show.upcoming.is_(True), Show.start_time <= now) \
+        .with_for_update() \
+        .all()
+    venues = defaultdict(lambda: [0, 0])
+    artists = defaultdict(lambda: [0, 0])
+    for _, venue_id, artist_id in rows:
+        for delta in (venues[venue_id], artists[artist_id]):
+            delta[0] -= 1
+            delta[1] += 1
+    # By id: a show inserted meanwhile is left for the next run
+    for start in range(0, len(rows), ROLLOVER_BATCH):
+        ids = [row.id for row in rows[start:start + ROLLOVER_BATCH]]
+        Show.query.filter(Show.id.in_(ids)) \
+            .update({Show.upcoming: False, Show.updated_at: Show.updated_at}, synchronize_session=False)
+    _apply(Venue, venues)
+    _apply(Artist, artists)
+    return len(rows)
+
+
+#  Reconciliation
+#  ----------------------------------------------------------------
+
+def _actual_counts(column, now):
+    upcoming = func.sum(case((Show.start_time > now, 1), else_=0))
+    past = func.sum(case((Show.start_time <= now, 1), else_=0))
+    rows = db.session.query(column, upcoming, past).group_by(column).all()
+    return {id: ShowCounts(int(upcoming or 0), int(past or 0)) for id, upcoming, past in rows}
+
+
+def reconcile_show_counts(fix=False, now=None):
+    # Compares the counters with the Show table after a rollover. Returns
+    # [(entity, id, stored ShowCounts, actual ShowCounts)]; with fix, the
+    # counters and Show.upcoming are corrected. The caller commits.
+    now = now or datetime.now()
+    rollover_show_counts(now)
+    mismatches = []
+    for entity, model, column in (('venue', Venue, Show.venue_id), ('artist', Artist, Show.artist_id)):
+        actual = _actual_counts(column, now)
+        deltas = {}
+        rows = db.session.query(model.id, model.upcoming_shows_count, model.past_shows_count).order_by(model.id)
+        for id, upcoming, past in rows:
+            stored = ShowCounts(upcoming, past)
+            counts = actual.get(id, NO_SHOWS)
+            if stored != counts:
+                mismatches.append((entity, id, stored, counts))
+                deltas[id] = [counts.upcoming - stored.upcoming, counts.past - stored.past]
+        if fix:
+            _apply(model, deltas)
+    if fix:
+        # e.g. rows inserted without count_shows; the counters now follow start_time
+        Show.query.filter(Show.upcoming != (Show.start_time > now)) \
+            .update({Show.upcoming: Show.start_time > now, Show.updated_at: Show.updated_at},
+                    synchronize_session=False)
+    return mismatches
@@ -0,0 +1,75 @@
+from datetime import datetime
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from forms import ShowForm
+from models import Show, db
+from queries import shows_page
+from pagination import InvalidCursor, page_size
+from cache import cached_page, bump_versions
+from conditional import conditional
+from profiles import refresh_artist_profile
+from show_counts import count_shows
+from partitions import ensure_partitions_for
+
+#----------------------------------------------------------------------------#
+# Show pages: listing and create
+#----------------------------------------------------------------------------#
+
+bp = Blueprint('shows', __name__)
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@conditional('show', 'venue', 'artist')
+@cached_page('show', 'venue', 'artist')
+def shows():
+    try:
+        page = shows_page(request.args.get('cursor'), page_size(request.args.get('limit')))
+        return render_template('pages/shows.html', shows=page.items, page=page)
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occurred. Cannot display shows')
+        return redirect(url_for('index'))
+
+@bp.route('/shows/create', methods=['GET'])
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db, upon submitting new show listing form
+    # TODO: insert form data as a new Show record in the db, instead
+    try:
+        form = ShowForm()
+        if (form.validate()):
+            show = Show(
+                artist_id = form.artist_id.data,
+                venue_id = form.venue_id.data
+            )
+            # The month's partition must exist before the insert (PostgreSQL)
+            ensure_partitions_for([show.start_time or datetime.now()])
+            # commit session to database
+            db.session.add(show)
+            db.session.flush()
+            count_shows([(show.venue_id, show.artist_id, show.upcoming)])
+            refresh_artist_profile(show.artist_id)
+            bump_versions('show')
+            db.session.commit()
+            flash('Show was successfully listed!')
+        else:
+            errorMessage = "Errors in the following fields: "
+            for error in form.errors:
+                errorMessage += error + " "
+            flash(errorMessage)
+    except:
+        # catches errors
+        db.session.rollback()
+        flash('An error occurred. Show could not be listed.')
+    finally:
+        # closes session
+        db.session.close()
+    return render_template('pages/home.html')
@@ -0,0 +1,47 @@
+from flask import current_app
+from jobs import task
+from cache import bump_versions
+from profiles import refresh_artist_profile, refresh_venue_artist_profiles, rollover_artist_profiles
+from show_counts import rollover_show_counts
+from partitions import ensure_show_partitions
+
+#----------------------------------------------------------------------------#
+# Background tasks (see jobs.py)
+# - Called with the job payload as keyword arguments in an app context; the
+#   worker commits their changes together with the job's completion
+# - May run more than once for the same job, so they must be idempotent
+#----------------------------------------------------------------------------#
+
+@task('refresh_venue_artist_profiles')
+def refresh_venue_artist_profiles_task(venue_id):
+    # Every artist that played the venue: can be hundreds of documents
+    refresh_venue_artist_profiles(venue_id)
+    bump_versions('artist')
+
+
+@task('refresh_artist_profiles')
+def refresh_artist_profiles_task(artist_ids):
+    # e.g. the artists of a deleted venue, whose shows went with it
+    for artist_id in artist_ids:
+        refresh_artist_profile(artist_id)
+    bump_versions('artist')
+
+
+@task('rollover_show_counts')
+def rollover_show_counts_task():
+    # Periodic, see JOBS_SCHEDULE
+    if rollover_show_counts():
+        bump_versions('venue', 'artist')
+
+
+@task('rollover_artist_profiles')
+def rollover_artist_profiles_task():
+    # Periodic: the profiles in which an upcoming show has started
+    if rollover_artist_profiles():
+        bump_versions('artist')
+
+
+@task('ensure_show_partitions')
+def ensure_show_partitions_task():
+    # Periodic: the next months of Show partitions (PostgreSQL only)
+    ensure_show_partitions(months_ahead=current_app.config['SHOW_PARTITION_MONTHS_AHEAD'])
@@ -0,0 +1,69 @@
+import logging
+import os
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from cache import LRUCache, NullCache
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Template caching
+# - Compiled templates are kept on local disk (TEMPLATE_BYTECODE_CACHE_DIR)
+#   so a new worker loads bytecode instead of compiling every template
+# - {% cache 'show', show.id, show.version %}...{% endcache %} keeps the
+#   rendered fragment in a per-process LRU under the template, the tag's
+#   line and the given values. When a list page is rebuilt after a write,
+#   only the items whose id/version changed are rendered again.
+# - Fragments are per process, so a deploy (new processes) never serves
+#   fragments of old templates
+#----------------------------------------------------------------------------#
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=NullCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        prefix = nodes.Const(f'{parser.name}:{lineno}')
+        call = self.call_method('_render', [prefix, nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, prefix, parts, caller):
+        cache = self.environment.fragment_cache
+        key = prefix + '|' + '|'.join(map(str, parts))
+        fragment = cache.get(key)
+        if fragment is None:
+            cache.misses += 1
+            # Markup: stored as is, so it isn't escaped again on a hit
+            fragment = caller()
+            cache.set(key, fragment)
+        else:
+            cache.hits += 1
+        return fragment
+
+
+def _bytecode_cache(directory):
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        log.warning('Cannot create %s, templates will be compiled by every worker', directory)
+        return None
+    return FileSystemBytecodeCache(directory)
+
+
+def init_templating(app):
+    env = app.jinja_env
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if directory:
+        env.bytecode_cache = _bytecode_cache(directory)
+    env.add_extension(FragmentCacheExtension)
+    max_entries = app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 10000)
+    env.fragment_cache = LRUCache(max_entries) if max_entries else NullCache()
@@ -0,0 +1,261 @@
+import logging
+from datetime import datetime
+from flask import Blueprint, abort, flash, jsonify, redirect, render_template, request, url_for
+from forms import VenueForm
+from models import Venue, Genre, Show, db
+from queries import venue_areas, venue_detail, venues_by_genre, genre_names
+from pagination import InvalidCursor, keyset_page, page_size
+from cache import cached_page, bump_versions
+from conditional import conditional
+from search import venue_search, index_venue, unindex_venue
+from jobs import enqueue
+from show_counts import discount_shows
+
+#----------------------------------------------------------------------------#
+# Venue pages: listing, search, genre pages, detail, create, edit, delete
+#----------------------------------------------------------------------------#
+
+bp = Blueprint('venues', __name__)
+log = logging.getLogger(__name__)
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@conditional('venue', 'show')
+@cached_page('venue', 'show')
+def venues():
+    try:
+        # Areas, venues and upcoming show counts come from a single query
+        data = venue_areas()
+        return render_template('pages/venues.html', areas=data)
+    except:
+        flash('An error occurred. Cannot display venues')
+        return redirect(url_for('index'))
+
+
+@bp.route('/venues/search', methods=['GET', 'POST'])
+def search_venues():
+    # POST from the search box, GET from the pager links
+    search_item = request.values.get('search_term', '')
+    # Find item
+    data = []
+    try:
+        # Matches name, city, state and genres, best match first
+        query, keys = venue_search(search_item)
+        page = keyset_page(query, keys, request.args.get('cursor'), page_size(request.args.get('limit')))
+        search_result_list = page.items
+
+        # Make list result
+        for venue_item in search_result_list:
+            data.append({
+                "id": venue_item.id,
+                "name": venue_item.name,
+                "num_upcoming_shows": venue_item.upcoming_shows_count
+            })
+            
+        # Generate the response 
+        response = {
+            "count": query.order_by(None).count(),
+            "data": data
+        }
+
+        return render_template('pages/search_venues.html', results=response, page=page, search_term=search_item)
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occured while searching')
+        return redirect(url_for('venues.venues'))
+
+@bp.route('/venues/genres/<genre>')
+@conditional('venue')
+@cached_page('venue')
+def venues_genre(genre):
+    try:
+        page = venues_by_genre(genre, request.args.get('cursor'), page_size(request.args.get('limit')))
+    except InvalidCursor:
+        abort(400)
+    except:
+        flash('An error occurred. Cannot display venues')
+        return redirect(url_for('venues.venues'))
+    return render_template('pages/genre.html', kind='venues', genre=genre, items=page.items, page=page)
+
+@bp.route('/venues/<int:venue_id>')
+@conditional('venue', 'artist', 'show')
+@cached_page('venue', 'artist', 'show')
+def show_venue(venue_id):
+    try:
+        data = venue_detail(venue_id)
+    except:
+        flash('An error occurred. Cannot show the venues')
+        return redirect(url_for('index'))
+    if data is None:
+        abort(404)
+    return render_template('pages/show_venue.html', venue=data)
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    try:
+        # get form data 
+        form = VenueForm()
+        if form.validate():
+            new_name = form.name.data
+            new_name_count = Venue.query.filter_by(name = new_name).count()
+            log.debug('%d venue(s) named %r', new_name_count, new_name)
+            # Check for existed record
+            if (new_name_count == 0):
+                venue = Venue(
+                    name=form.name.data,
+                    city=form.city.data,
+                    state=form.state.data,
+                    address=form.address.data,
+                    phone=form.phone.data,
+                    genres=Genre.from_names(form.genres.data),
+                    facebook_link=form.facebook_link.data,
+                    image_link=form.image_link.data,
+                    website=form.website_link.data,
+                    seeking_talent=form.seeking_talent.data,
+                    # If we don't tick into seeking_talent, the web won't record the seeking_description 
+                    seeking_description= form.seeking_description.data if (form.seeking_talent.data) else None,
+                    timezone=form.timezone.data or None
+                )
+                # commit session to database
+                db.session.add(venue)
+                db.session.flush()
+                index_venue(venue)
+                bump_versions('venue')
+                db.session.commit()
+                # flash success
+                flash('Venue ' + request.form['name'] + ' was successfully listed!')
+            else: 
+                flash('Venue ' + request.form['name'] + ' was existed')
+        else:
+            errorMessage = "Errors in the following fields: "
+            for error in form.errors:
+                errorMessage += error + " "
+            flash(errorMessage)
+    except:
+        # catches errors
+        db.session.rollback()
+        flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+    finally:
+        # closes session
+        db.session.close()
+    return render_template('pages/home.html')
+
+
+@bp.route('/venues/<int:venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    try: 
+        # Its shows go with it, out of the artists' counters and profiles
+        artist_ids = [id for (id,) in db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()]
+        discount_shows(Show.venue_id == venue_id)
+        Show.query.filter(Show.venue_id == venue_id).delete(synchronize_session=False)
+        Venue.query.filter_by(id = venue_id).delete()
+        unindex_venue(venue_id)
+        bump_versions('venue', 'artist', 'show')
+        if artist_ids:
+            enqueue('refresh_artist_profiles', artist_ids=artist_ids)
+        db.session.commit()
+        flash('Detele venue successfully')
+        db.session.close()
+        return jsonify({'success': True}), 200
+    except:
+        db.session.rollback()
+        db.session.close()
+        flash('Error(s) occurred when detele venue')
+        return jsonify({'success': False}), 404
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    try:
+        form = VenueForm()
+        # Get the venue entity
+        venue_ent = Venue.query.filter_by(id = venue_id).first()
+        # Check for valid entity
+        if (venue_ent is not None): 
+            venue = {}
+            venue["id"] = venue_ent.id
+            venue["name"] = venue_ent.name
+            venue["genres"] = genre_names(venue_ent.genres)
+            venue["address"] = venue_ent.address
+            venue["city"] = venue_ent.city
+            venue["state"] = venue_ent.state
+            venue["phone"] = venue_ent.phone
+            venue["website"] = venue_ent.website
+            venue["facebook_link"] = venue_ent.facebook_link
+            venue["seeking_talent"] = venue_ent.seeking_talent
+            venue["image_link"] = venue_ent.image_link
+            venue["timezone"] = venue_ent.timezone
+            if (venue_ent.seeking_talent == True): 
+                venue["seeking_description"] = venue_ent.seeking_description
+            return render_template('forms/edit_venue.html', form=form, venue=venue)
+        else:
+            flash(f'The venues id {venue_id} is invalid')
+            return redirect(url_for('index'))
+    except:
+        flash('An error occurred. Cannot get the venue')
+        return redirect(url_for('index'))  
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    try:
+        # Check for valid id
+        venue_to_update = Venue.query.filter_by(id = venue_id).first()
+        if (venue_to_update is not None):
+            old_name = venue_to_update.name
+            form = VenueForm()
+            if form.validate():
+                venue_to_update.name=form.name.data
+                venue_to_update.city=form.city.data
+                venue_to_update.state=form.state.data
+                venue_to_update.address=form.address.data
+                venue_to_update.phone=form.phone.data
+                venue_to_update.genres=Genre.from_names(form.genres.data)
+                # A genre change alone doesn't touch the row; exports rely on updated_at
+                venue_to_update.updated_at=datetime.now()
+                venue_to_update.facebook_link=form.facebook_link.data
+                venue_to_update.image_link=form.image_link.data
+                venue_to_update.website=form.website_link.data
+                venue_to_update.seeking_talent=form.seeking_talent.data
+                # If we don't tick into seeking_talent, the web won't record the seeking_description 
+                venue_to_update.seeking_description= form.seeking_description.data if (form.seeking_talent.data) else None
+                venue_to_update.timezone=form.timezone.data or None
+                # Artist profiles embed the venue name and image; rebuilt by a
+                # worker once this commits
+                enqueue('refresh_venue_artist_profiles', venue_id=venue_id)
+                index_venue(venue_to_update)
+                bump_versions('venue')
+                # Commit the change
+                db.session.commit() 
+                flash(f'Update venue {old_name} Success!')
+            else: 
+                errorMessage = "Errors in the following fields: "
+                for error in form.errors:
+                    errorMessage += error + " "
+                flash(errorMessage)
+        else:
+            # Return the homepage
+            flash('The venue id is invalid')
+            return redirect(url_for('index'))
+    except:
+        # catches errors
+        db.session.rollback()
+        flash(f'An error occurred. Venue {old_name} could not be updated.')
+    finally:
+        # closes session
+        db.session.close()
+    # venue record with ID <venue_id> using the new attributes
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
@@ -0,0 +1,11 @@
+from app import create_app
+
+#----------------------------------------------------------------------------#
+# WSGI entry point for production servers, e.g.
+#   gunicorn --workers 4 --preload wsgi:app
+# With --preload the app is built once in the master and forked into the
+# workers. Set SECRET_KEY (and DATABASE_URL) in the environment so every
+# worker signs sessions and CSRF tokens with the same key.
+#----------------------------------------------------------------------------#
+
+app = create_app()